@@ -137,3 +137,7 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Compressed, content-addressed store of raw article HTML (extract_articles --from-cache).
+# Empty = don't keep HTML.
+HTML_CACHE_DIR = config('HTML_CACHE_DIR', default='')
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Source, FetchLog, RawItem, Article, Event, EventItem
+from .models import (
+    Source, FetchLog, FetchLogHourly, RawItem, Article, Event, EventItem, PipelineRun, CachedPage, Watermark,
+)
 
 
 @admin.register(Source)
@@ -12,10 +14,27 @@ class SourceAdmin(admin.ModelAdmin):
 
 @admin.register(FetchLog)
 class FetchLogAdmin(admin.ModelAdmin):
-    list_display = ("fetched_at", "source", "status_code", "elapsed_ms", "bytes_received")
-    list_filter = ("status_code", "source__region", "source__topic")
+    list_display = ("fetched_at", "source", "status_code", "outcome", "items_new", "elapsed_ms", "bytes_received")
+    list_filter = ("outcome", "status_code", "source__region", "source__topic")
     search_fields = ("source__name", "source__url")
     ordering = ("-fetched_at",)
+    date_hierarchy = "fetched_at"
+    list_select_related = ("source",)
+    # COUNT(*) over the whole raw table is the slow part of the changelist
+    show_full_result_count = False
+
+
+@admin.register(FetchLogHourly)
+class FetchLogHourlyAdmin(admin.ModelAdmin):
+    list_display = (
+        "hour", "source", "fetches", "status_2xx", "status_3xx", "status_4xx", "status_5xx",
+        "errors", "unchanged", "items_new", "p50_ms", "p95_ms", "bytes_received",
+    )
+    list_filter = ("source__region", "source__topic", "source__cadence")
+    search_fields = ("source__name", "source__url")
+    ordering = ("-hour",)
+    date_hierarchy = "hour"
+    list_select_related = ("source",)
 
 class ArticleInline(admin.StackedInline):
     model = Article
@@ -29,6 +48,7 @@ class RawItemAdmin(admin.ModelAdmin):
     list_filter = ("source__region", "source__topic", "source__source_class")
     search_fields = ("title", "url", "source__name")
     ordering = ("-published_at", "-created_at")
+    raw_id_fields = ("dup_of",)
     inlines = [ArticleInline]
 
 
@@ -42,11 +62,14 @@ class ArticleAdmin(admin.ModelAdmin):
         "lang",
         "extracted_at",
         "has_error",
+        "error_class",
+        "attempts",
+        "next_attempt_at",
     )
 
-    list_filter = ("lang",)
+    list_filter = ("lang", "error_class")
     search_fields = ("title", "text", "item__title", "item__url")
-    readonly_fields = ("extracted_at",)
+    readonly_fields = ("extracted_at", "attempts", "next_attempt_at")
 
     def short_title(self, obj):
         if obj.title:
@@ -77,3 +100,22 @@ class EventAdmin(admin.ModelAdmin):
     def short_title(self, obj):
         return (obj.title or "")[:80]
 
+
+@admin.register(PipelineRun)
+class PipelineRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "started_at", "finished_at", "ok", "stages")
+    list_filter = ("ok",)
+    ordering = ("-started_at",)
+    readonly_fields = ("started_at", "finished_at", "ok", "stages", "error")
+
+
+@admin.register(Watermark)
+class WatermarkAdmin(admin.ModelAdmin):
+    list_display = ("name", "value", "updated_at")
+
+
+@admin.register(CachedPage)
+class CachedPageAdmin(admin.ModelAdmin):
+    list_display = ("id", "sha256", "size", "stored_size", "fetched_at", "final_url")
+    search_fields = ("final_url", "sha256")
+    date_hierarchy = "fetched_at"
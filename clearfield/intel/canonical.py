@@ -0,0 +1,59 @@
+"""
+Canonical article URLs: the same story syndicated through several feeds
+(often with tracking parameters) maps to one key.
+"""
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# query parameters that never change the page
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "yclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "_hsenc", "_hsmi", "ref", "ref_src", "ref_url", "cmpid", "ncid",
+    "ito", "spm", "smid",
+})
+TRACKING_PREFIXES = ("utm_", "at_", "pk_", "mtm_", "oly_")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize for dedup (not for fetching):
+    lowercase scheme/host, http -> https, no default port, no fragment,
+    no tracking parameters, "/" for an empty path.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if scheme not in DEFAULT_PORTS or not host:
+        return url
+
+    netloc = f"[{host}]" if ":" in host else host
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+
+    query = urlencode(
+        [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not is_tracking_param(k)]
+    )
+    # the same page is routinely linked over both schemes
+    return urlunsplit(("https", netloc, parts.path or "/", query, ""))
+
+
+def canonical_key(url: str) -> str:
+    """sha256 of canonical_url(): fixed width, indexable on MySQL."""
+    canon = canonical_url(url)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest() if canon else ""
@@ -0,0 +1,11 @@
+"""
+DB helpers shared by the long-running commands (run_scheduler, extract_articles --follow).
+"""
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+@sync_to_async
+def recycle_connections():
+    # long-lived process: drop connections MySQL may have timed out
+    close_old_connections()
@@ -0,0 +1,337 @@
+"""
+Feed body -> RawItem payload dicts.
+
+Kept free of Django/ORM imports: these functions run inside the
+ProcessPoolExecutor workers of ingest_feeds / run_scheduler.
+"""
+import hashlib
+import re
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+
+import feedparser
+from feedparser.mixin import _FeedParserMixin
+from feedparser.sanitizer import _sanitize_html
+from feedparser.urls import resolve_relative_uris
+from lxml import etree
+
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+MEDIA_NS = "{http://search.yahoo.com/mrss/}"
+
+# item children the fast path understands; anything else (dc:*, itunes:*,
+# atom:link inside RSS, ...) may feed title/link/summary in feedparser
+RSS_ITEM_TAGS = frozenset({
+    "title", "link", "description", "guid", "pubDate", "category",
+    "comments", "enclosure", "author", "source", CONTENT_ENCODED,
+})
+ATOM_ENTRY_TAGS = frozenset(
+    ATOM_NS + t
+    for t in ("id", "title", "link", "summary", "content", "published", "updated",
+              "author", "contributor", "category", "rights")
+)
+# repeats of these are resolved differently by feedparser (last one wins)
+SINGLE_TAGS = frozenset(
+    {"title", "link", "description", "guid", "pubDate", CONTENT_ENCODED}
+    | {ATOM_NS + t for t in ("id", "title", "summary", "content", "published", "updated")}
+)
+# leaf media elements (no media:title/description inside) are ignored by both parsers
+MEDIA_LEAF_TAGS = frozenset({MEDIA_NS + "content", MEDIA_NS + "thumbnail"})
+
+# bytes handed to the pull parser per step
+FAST_CHUNK = 64 * 1024
+
+XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+
+# without these characters feedparser's HTML pass returns the text unchanged
+MARKUP_CHARS = frozenset("<>&")
+# feedparser maps C1 controls through cp1252 and re-decodes latin-1-looking UTF-8
+C1_CONTROLS_RE = re.compile("[\x80-\x9f]")
+# RSS <link>: feedparser undoes a double-escaped query string ("&amp;b=2" -> "&b=2")
+LINK_ENTITY_RE = re.compile("&([A-Za-z0-9_]+);")
+
+
+class FastPathUnsupported(Exception):
+    """Feed uses something the fast parser does not reproduce exactly; use feedparser."""
+
+
+def make_item_hash(entry) -> str:
+    base = (
+        entry.get("id")
+        or entry.get("guid")
+        or (
+            (entry.get("link", "") or "")
+            + (entry.get("published", "") or "")
+            + (entry.get("title", "") or "")
+        )
+    )
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def normalize_published(entry) -> datetime | None:
+    """RFC 822 `published` first, then feedparser's parsed struct (covers Atom ISO dates). Always UTC-aware."""
+    dt = None
+    if entry.get("published"):
+        try:
+            dt = parsedate_to_datetime(entry.get("published"))
+        except Exception:
+            dt = None
+
+    if dt is None:
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        if parsed:
+            try:
+                dt = datetime(*parsed[:6], tzinfo=dt_timezone.utc)
+            except Exception:
+                dt = None
+
+    if dt is not None and dt.tzinfo is None:
+        dt = dt.replace(tzinfo=dt_timezone.utc)
+    return dt
+
+
+def parse_feed(data: bytes, fast: bool = False) -> list[dict]:
+    """
+    Parse a feed body into RawItem payload dicts (picklable, sent back from pool workers).
+    fast=True tries parse_feed_fast first and falls back to feedparser.
+    """
+    if fast:
+        try:
+            return parse_feed_fast(data)
+        except (FastPathUnsupported, etree.LxmlError, ValueError):
+            pass
+    return parse_feed_full(data)
+
+
+def parse_feed_full(data: bytes) -> list[dict]:
+    feed = feedparser.parse(data)
+
+    items_payload = []
+    for entry in feed.entries:
+        items_payload.append(
+            {
+                "item_hash": make_item_hash(entry),
+                "guid": entry.get("id") or entry.get("guid", ""),
+                "url": entry.get("link", ""),
+                "title": entry.get("title", ""),
+                "summary": entry.get("summary", ""),
+                "published_at": normalize_published(entry),
+            }
+        )
+    return items_payload
+
+
+# -----------------------------
+# Fast path: streaming RSS 2.0 / Atom 1.0
+# -----------------------------
+def _text(elem) -> str:
+    if elem is None:
+        return ""
+    if len(elem):
+        raise FastPathUnsupported("nested markup")
+    return (elem.text or "").strip()
+
+
+def _html(text: str) -> str:
+    """
+    What feedparser does to an HTML-typed element (RSS description, type="html", ...):
+    its relative-URI pass (no base: xml:base feeds are left to feedparser) and sanitizer.
+    These are feedparser internals, pinned in requirements.txt.
+    """
+    if not MARKUP_CHARS.intersection(text):
+        return text
+    out = resolve_relative_uris(text, "", "utf-8", "text/html")
+    return _sanitize_html(out, "utf-8", "text/html")
+
+
+def _rss_title(elem) -> str:
+    # RSS titles are plain text unless they look like HTML (feedparser's heuristic)
+    _check_attrs(elem)
+    title = _text(elem)
+    if MARKUP_CHARS.intersection(title) and _FeedParserMixin.looks_like_html(title):
+        return _html(title)
+    return title
+
+
+def _atom_text(elem) -> str:
+    if elem is None:
+        return ""
+    typ = elem.get("type") or "text"
+    if len(elem.attrib) > ("type" in elem.attrib) or typ not in ("text", "html"):
+        raise FastPathUnsupported(f"{elem.tag!r} attributes")
+    text = _text(elem)
+    return _html(text) if typ == "html" else text
+
+
+def _check_attrs(elem):
+    if elem is not None and len(elem.attrib):
+        raise FastPathUnsupported(f"{elem.tag!r} attributes")
+
+
+def _check_fixups(*values: str):
+    """feedparser's last-step encoding fixups are rare; leave text they would change to it."""
+    for v in values:
+        if v.isascii():
+            continue
+        if C1_CONTROLS_RE.search(v):
+            raise FastPathUnsupported("C1 control characters")
+        try:
+            fixed = v.encode("iso-8859-1").decode("utf-8")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            continue
+        if fixed != v:
+            raise FastPathUnsupported("latin-1 mojibake")
+
+
+def _check_children(elem, allowed: frozenset):
+    seen = set()
+    for child in elem:
+        tag = child.tag
+        if tag in MEDIA_LEAF_TAGS and not len(child):
+            continue
+        if tag not in allowed:
+            raise FastPathUnsupported(f"element {tag!r}")
+        if tag in SINGLE_TAGS:
+            if tag in seen:
+                raise FastPathUnsupported(f"repeated {tag!r}")
+            seen.add(tag)
+
+
+def _payload(guid: str, link: str, title: str, summary: str, published: str, published_at) -> dict:
+    _check_fixups(guid, link, title, summary, published)
+    # mirrors make_item_hash() over a feedparser entry
+    base = guid or (link + published + title)
+    return {
+        "item_hash": hashlib.sha256(base.encode("utf-8")).hexdigest(),
+        "guid": guid,
+        "url": link,
+        "title": title,
+        "summary": summary,
+        "published_at": published_at,
+    }
+
+
+def _rss_item(item) -> dict:
+    _check_children(item, RSS_ITEM_TAGS)
+
+    guid_el = item.find("guid")
+    guid = _text(guid_el)
+    link_el = item.find("link")
+    link = _text(link_el)
+    if "&" in link:
+        link = LINK_ENTITY_RE.sub(r"&\g<1>", link.replace("&amp;", "&"))
+    # feedparser: a permalink guid stands in only when there is no <link> at all
+    if link_el is None and guid and (guid_el.get("isPermaLink") or "true").lower() != "false":
+        link = guid
+
+    desc = item.find("description")
+    if desc is None:
+        desc = item.find(CONTENT_ENCODED)
+    _check_attrs(desc)
+    summary = _html(_text(desc))
+
+    published = _text(item.find("pubDate"))
+    published_at = None
+    if published:
+        try:
+            published_at = parsedate_to_datetime(published)
+        except (TypeError, ValueError):
+            raise FastPathUnsupported("pubDate format")
+        if published_at.tzinfo is None:
+            published_at = published_at.replace(tzinfo=dt_timezone.utc)
+
+    return _payload(guid, link, _rss_title(item.find("title")), summary, published, published_at)
+
+
+def _iso(value: str) -> datetime:
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        raise FastPathUnsupported("date format")
+    if dt.tzinfo is None:
+        raise FastPathUnsupported("naive date")
+    return dt.replace(microsecond=0)
+
+
+def _atom_entry(entry) -> dict:
+    _check_children(entry, ATOM_ENTRY_TAGS)
+
+    # feedparser: the last rel=alternate link with an HTML type wins
+    link = ""
+    for el in entry.iterfind(ATOM_NS + "link"):
+        rel = el.get("rel") or "alternate"
+        typ = el.get("type") or "text/html"
+        if rel == "alternate" and typ in ("text/html", "application/xhtml+xml"):
+            link = (el.get("href") or "").strip()
+    if not link.startswith(("http://", "https://")):
+        raise FastPathUnsupported("no absolute alternate link")
+
+    summ = entry.find(ATOM_NS + "summary")
+    summary = _atom_text(summ if summ is not None else entry.find(ATOM_NS + "content"))
+
+    published = _text(entry.find(ATOM_NS + "published"))
+    updated = _text(entry.find(ATOM_NS + "updated"))
+    published_at = None
+    if published or updated:
+        published_at = _iso(published or updated)
+
+    return _payload(_text(entry.find(ATOM_NS + "id")), link, _atom_text(entry.find(ATOM_NS + "title")), summary, published, published_at)
+
+
+def iter_feed_fast(chunks):
+    """
+    Incremental RSS 2.0 / Atom 1.0 parser over an iterable of byte chunks.
+    Yields the same payload dicts as parse_feed_full; finished items are
+    cleared as we go so the parse tree stays small on large feeds.
+    Raises FastPathUnsupported for anything feedparser would treat differently.
+    """
+    parser = etree.XMLPullParser(
+        events=("start", "end"),
+        resolve_entities=False,
+        no_network=True,
+        huge_tree=False,
+    )
+    kind = None
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start" and XML_BASE in elem.attrib:
+                raise FastPathUnsupported("xml:base")
+            if kind is None:
+                if elem.tag == "rss" and elem.get("version", "").startswith("2."):
+                    kind = "rss"
+                elif elem.tag == ATOM_NS + "feed":
+                    kind = "atom"
+                else:
+                    raise FastPathUnsupported(f"root {elem.tag!r}")
+                continue
+            if event != "end":
+                continue
+            if kind == "rss" and elem.tag == "item":
+                yield _rss_item(elem)
+                elem.clear()
+            elif kind == "atom" and elem.tag == ATOM_NS + "entry":
+                yield _atom_entry(elem)
+                elem.clear()
+
+    parser.close()
+    if kind is None:
+        raise FastPathUnsupported("empty document")
+
+
+def parse_feed_fast(data: bytes) -> list[dict]:
+    """
+    The body is already read in full: parsing runs in the ProcessPoolExecutor
+    workers, which get the bytes pickled from the event loop, and the fetcher
+    needs the whole body anyway for the unchanged-body hash and, on
+    FastPathUnsupported, for the feedparser fallback. So this is not streaming
+    off the socket; the chunks only keep the pull parser's tree bounded.
+    """
+    view = memoryview(data)
+    return list(iter_feed_fast(bytes(view[i:i + FAST_CHUNK]) for i in range(0, len(view), FAST_CHUNK)))
@@ -0,0 +1,218 @@
+"""
+Bounded HTTP body reads and per-host politeness shared by ingest_feeds and extract_articles.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import aiohttp
+from charset_normalizer import from_bytes
+
+
+READ_CHUNK = 64 * 1024
+
+FEED_MAX_BYTES = 10 * 1024 * 1024
+ARTICLE_MAX_BYTES = 5 * 1024 * 1024
+
+# never useful as a feed
+FEED_BLOCKED_TYPES = ("video/", "audio/", "image/", "application/pdf", "application/zip")
+# anything else is not worth handing to trafilatura
+ARTICLE_ALLOWED_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# responses that mean "slow down" rather than "broken"
+THROTTLE_STATUSES = (429, 503)
+# cooldown when a throttling response has no usable Retry-After
+THROTTLE_DEFAULT_DELAY = 30.0
+
+
+class ResponseAborted(Exception):
+    """Body read stopped on purpose (size cap / content type); `kind` is the error class."""
+
+    kind = "aborted"
+
+    def __str__(self) -> str:
+        return f"{self.kind}: {super().__str__()}"
+
+
+class BodyTooLarge(ResponseAborted):
+    kind = "too_large"
+
+
+class UnwantedContentType(ResponseAborted):
+    kind = "bad_content_type"
+
+
+class HttpStatusError(RuntimeError):
+    """Non-throttling HTTP error status (>= 400)."""
+
+    def __init__(self, status: int):
+        self.status = status
+        super().__init__(f"HTTP {status}")
+
+
+class HostThrottled(Exception):
+    """429/503 from a host; `retry_after` is seconds from now (None = not given)."""
+
+    def __init__(self, status: int, retry_after: float | None = None):
+        self.status = status
+        self.retry_after = retry_after
+        super().__init__(f"HTTP {status}" + (f" (Retry-After {retry_after:.0f}s)" if retry_after is not None else ""))
+
+
+class HostSkipped(HostThrottled):
+    """The host asked for a longer pause than we wait in-run: fail fast until it is over."""
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After is either delta-seconds or an HTTP date; returns seconds from now."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=dt_timezone.utc)
+    return max(0.0, (when - datetime.now(dt_timezone.utc)).total_seconds())
+
+
+def raise_for_throttle(resp: aiohttp.ClientResponse):
+    if resp.status in THROTTLE_STATUSES:
+        raise HostThrottled(resp.status, parse_retry_after(resp.headers.get("Retry-After")))
+
+
+class TokenBucket:
+    """`rate` requests/second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token; returns how long to wait before it may be used."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class PoliteLimiter:
+    """
+    Global + per-host concurrency, a per-host token bucket and per-host cooldowns
+    (Retry-After). Waiting for a host never holds a global slot, so other hosts
+    keep going while one is throttled. Skipped hosts (skip_host) raise HostSkipped
+    from slot() instead of waiting.
+    """
+
+    def __init__(self, concurrency: int, per_host: int, rate: float = 0.0, burst: int = 1):
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._host_sems: dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        # rate <= 0: no rate limit, concurrency only
+        self._buckets: dict[str, TokenBucket] | None = (
+            defaultdict(lambda: TokenBucket(rate, burst)) if rate > 0 else None
+        )
+        self._cooldown_until: dict[str, float] = {}
+        # host -> (skip until, status): Retry-After too long to wait out in this run
+        self._skipped: dict[str, tuple[float, int]] = {}
+        self.throttled = 0
+
+    def cooldown(self, url: str, seconds: float):
+        host = host_of(url)
+        until = time.monotonic() + seconds
+        self._cooldown_until[host] = max(self._cooldown_until.get(host, 0.0), until)
+        self.throttled += 1
+
+    def skip_host(self, url: str, seconds: float, status: int):
+        """Requests to this host fail with HostSkipped (no request, no sleep) for `seconds`."""
+        host = host_of(url)
+        until = time.monotonic() + seconds
+        self._skipped[host] = (max(self._skipped.get(host, (0.0, status))[0], until), status)
+        self.throttled += 1
+
+    def check_skipped(self, url: str):
+        until, status = self._skipped.get(host_of(url), (0.0, 0))
+        left = until - time.monotonic()
+        if left > 0:
+            raise HostSkipped(status, left)
+
+    def throttled_hosts(self) -> int:
+        return len(self._cooldown_until.keys() | self._skipped.keys())
+
+    def cooling_hosts(self) -> int:
+        now = time.monotonic()
+        cooling = {h for h, until in self._cooldown_until.items() if until > now}
+        cooling |= {h for h, (until, _) in self._skipped.items() if until > now}
+        return len(cooling)
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = host_of(url)
+        self.check_skipped(url)
+        async with self._host_sems[host]:
+            # the host may have been skipped while we queued behind it
+            self.check_skipped(url)
+            while True:
+                wait = self._cooldown_until.get(host, 0.0) - time.monotonic()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self._buckets is not None:
+                wait = self._buckets[host].reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            async with self._sem:
+                yield
+
+
+def check_content_type(resp: aiohttp.ClientResponse, allowed=None, blocked=None):
+    ctype = (resp.content_type or "").lower()
+    # no header at all: let the parser decide
+    if not resp.headers.get("Content-Type"):
+        return
+    if blocked and ctype.startswith(blocked):
+        raise UnwantedContentType(ctype)
+    if allowed and not ctype.startswith(allowed):
+        raise UnwantedContentType(ctype)
+
+
+async def read_capped(resp: aiohttp.ClientResponse, max_bytes: int) -> bytes:
+    """Stream the body; abort as soon as it is known to exceed max_bytes."""
+    if max_bytes and resp.content_length is not None and resp.content_length > max_bytes:
+        raise BodyTooLarge(f"Content-Length {resp.content_length} > {max_bytes}")
+
+    buf = bytearray()
+    async for chunk in resp.content.iter_chunked(READ_CHUNK):
+        buf += chunk
+        if max_bytes and len(buf) > max_bytes:
+            raise BodyTooLarge(f"body > {max_bytes} bytes")
+    return bytes(buf)
+
+
+def decode_body(body: bytes, charset: str | None) -> str:
+    """Like aiohttp's resp.text(errors="ignore"): header charset, else utf-8, else detection."""
+    if charset:
+        try:
+            return body.decode(charset, errors="ignore")
+        except LookupError:
+            pass
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        best = from_bytes(body).best()
+        return body.decode(best.encoding if best else "utf-8", errors="ignore")
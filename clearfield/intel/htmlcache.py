@@ -0,0 +1,58 @@
+"""
+Content-addressed store of raw article HTML: <root>/ab/cd/<sha256>.html.gz.
+
+ORM-free, like intel.feeds: extract_articles reads and writes it from pool workers.
+The DB side (final URL -> digest) is intel.models.CachedPage.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+
+COMPRESS_LEVEL = 6
+
+
+def html_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def url_key(url: str) -> str:
+    # fixed-width key: final URLs can be longer than an index allows
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+class HtmlCache:
+    def __init__(self, root: str | os.PathLike):
+        self.root = Path(root)
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / f"{digest}.html.gz"
+
+    def has(self, digest: str) -> bool:
+        return self.path_for(digest).exists()
+
+    def put(self, html: str) -> tuple[str, int]:
+        """Store html (utf-8); returns (digest, compressed size). Identical pages are stored once."""
+        data = html.encode("utf-8")
+        digest = html_digest(data)
+        path = self.path_for(digest)
+        if path.exists():
+            return digest, path.stat().st_size
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        packed = gzip.compress(data, COMPRESS_LEVEL, mtime=0)
+        # write + rename: concurrent workers storing the same page never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(packed)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return digest, len(packed)
+
+    def get(self, digest: str) -> str:
+        return gzip.decompress(self.path_for(digest).read_bytes()).decode("utf-8")
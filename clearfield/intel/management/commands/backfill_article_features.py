@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from intel.management.commands.extract_articles import DEFAULT_EXTRACT_WORKERS, make_extract_pool
+from intel.models import Article
+from intel.textfeatures import FEATURE_FIELDS, text_features_batch
+
+
+# texts per simhash64_batch() call (one pool task)
+BATCH = 64
+
+
+class Command(BaseCommand):
+    help = "Compute Article.clean_len/token_count/simhash/is_placeholder for articles that lack them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=500, help="Articles per read/bulk_update")
+        parser.add_argument("--workers", type=int, default=DEFAULT_EXTRACT_WORKERS, help="0 = compute inline")
+        parser.add_argument("--all", action="store_true", help="Recompute every article (after changing sanitize/tokenize)")
+
+    def handle(self, *args, **opts):
+        chunk = max(1, int(opts["chunk"]))
+        qs = Article.objects.all() if opts["all"] else Article.objects.filter(token_count__isnull=True)
+
+        started = time.monotonic()
+        done = 0
+        last_id = 0
+        with make_extract_pool(int(opts["workers"])) as pool:
+            mapper = pool.map if pool is not None else map
+            while True:
+                # keyset pagination: rows we just filled drop out of a token_count IS NULL filter anyway
+                rows = list(qs.filter(id__gt=last_id).order_by("id").values_list("id", "text")[:chunk])
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+
+                ids, texts = zip(*rows)
+                batches = [list(texts[i:i + BATCH]) for i in range(0, len(texts), BATCH)]
+                features = [f for part in mapper(text_features_batch, batches) for f in part]
+                batch = [Article(id=article_id, **f) for article_id, f in zip(ids, features)]
+                Article.objects.bulk_update(batch, FEATURE_FIELDS)
+                done += len(batch)
+
+                if int(opts["verbosity"]) >= 2:
+                    self.stdout.write(f"... {done} articles")
+
+        took = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Backfilled features for {done} articles in {took:.1f}s"))
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from pathlib import Path
+
+import aiohttp
+from django.core.management.base import BaseCommand, CommandError
+
+from intel.feeds import parse_feed, parse_feed_fast, parse_feed_full
+from intel.models import Source
+
+
+async def record_corpus(corpus: Path, limit: int) -> int:
+    """Download current bodies of enabled sources into corpus/<source_id>.xml."""
+    sources = [s async for s in Source.objects.filter(is_enabled=True).order_by("id")[:limit]]
+    timeout = aiohttp.ClientTimeout(total=30)
+    saved = 0
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+
+        async def one(src: Source):
+            nonlocal saved
+            try:
+                async with session.get(src.url) as resp:
+                    if resp.status >= 400:
+                        return
+                    data = await resp.read()
+            except Exception:
+                return
+            (corpus / f"{src.id}.xml").write_bytes(data)
+            saved += 1
+
+        await asyncio.gather(*(one(s) for s in sources))
+    return saved
+
+
+def time_parser(fn, bodies: list[bytes], repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for data in bodies:
+            fn(data)
+        took = time.perf_counter() - started
+        best = took if best is None else min(best, took)
+    return best
+
+
+class Command(BaseCommand):
+    help = "Benchmark the streaming feed parser against feedparser on a corpus of recorded feeds"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", required=True, help="Directory with recorded feed bodies (*.xml)")
+        parser.add_argument("--record", action="store_true", help="First download enabled sources into --corpus")
+        parser.add_argument("--limit", type=int, default=500, help="Max sources to record")
+        parser.add_argument("--repeat", type=int, default=5, help="Timing runs per parser (best is reported)")
+
+    def handle(self, *args, **opts):
+        corpus = Path(opts["corpus"])
+        repeat = max(1, int(opts["repeat"]))
+
+        if opts["record"]:
+            corpus.mkdir(parents=True, exist_ok=True)
+            saved = asyncio.run(record_corpus(corpus, int(opts["limit"])))
+            self.stdout.write(f"Recorded {saved} feeds into {corpus}")
+
+        paths = sorted(corpus.glob("*.xml"))
+        if not paths:
+            raise CommandError(f"No *.xml feeds in {corpus}")
+        bodies = [p.read_bytes() for p in paths]
+        total_mb = sum(len(b) for b in bodies) / 1e6
+
+        # Parity: the fast path must return exactly what feedparser-based parsing returns
+        fast_ok = 0
+        mismatches = []
+        items = 0
+        for path, data in zip(paths, bodies):
+            full = parse_feed_full(data)
+            items += len(full)
+            try:
+                fast = parse_feed_fast(data)
+            except Exception:
+                continue
+            fast_ok += 1
+            if fast != full:
+                mismatches.append(path.name)
+
+        t_full = time_parser(parse_feed_full, bodies, repeat)
+        t_auto = time_parser(lambda d: parse_feed(d, fast=True), bodies, repeat)
+
+        self.stdout.write(f"Corpus: {len(bodies)} feeds, {items} items, {total_mb:.1f} MB")
+        self.stdout.write(f"Fast path handled: {fast_ok}/{len(bodies)} feeds")
+        self.stdout.write(f"feedparser:        {t_full * 1000:.1f}ms ({items / t_full:.0f} items/s)")
+        self.stdout.write(f"fast + fallback:   {t_auto * 1000:.1f}ms ({items / t_auto:.0f} items/s)")
+        self.stdout.write(f"Speedup: x{t_full / t_auto:.2f}")
+
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"Parity mismatches ({len(mismatches)}): {', '.join(mismatches[:20])}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Parity: OK"))
@@ -0,0 +1,102 @@
+import random
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from intel.simhash import SimHashIndex, hamming64
+
+
+def prefix_nearest(buckets: dict, h: int, max_dist: int):
+    """The old lookup: scan events sharing the top 16 bits only."""
+    best, best_d = None, 10**9
+    for ev, other in buckets.get((h >> 48) & 0xFFFF, ()):
+        d = hamming64(h, other)
+        if d < best_d:
+            best, best_d = ev, d
+    return best if best_d <= max_dist else None
+
+
+def scan_nearest(hashes: list[int], h: int, max_dist: int):
+    """Ground truth: linear scan."""
+    best, best_d = None, max_dist + 1
+    for ev, other in enumerate(hashes):
+        d = hamming64(h, other)
+        if d < best_d:
+            best, best_d = ev, d
+    return best
+
+
+class Command(BaseCommand):
+    help = "Recall/speed of the banded SimHashIndex vs the old 16-bit prefix buckets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=100000)
+        parser.add_argument("--queries", type=int, default=2000)
+        parser.add_argument("--max-dist", type=int, default=3)
+        parser.add_argument(
+            "--popular-prefixes",
+            type=int,
+            default=0,
+            help="Draw event prefixes from only this many values (0 = uniform), to model crowded buckets",
+        )
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        rnd = random.Random(int(opts["seed"]))
+        max_dist = int(opts["max_dist"])
+        n_events = max(1, int(opts["events"]))
+        popular = int(opts["popular_prefixes"])
+
+        def random_hash() -> int:
+            h = rnd.getrandbits(64)
+            if popular:
+                h = (h & ((1 << 48) - 1)) | (rnd.randrange(popular) << 48)
+            return h
+
+        hashes = [random_hash() for _ in range(n_events)]
+
+        # queries: an event hash with 0..max_dist random bit flips anywhere
+        queries = []
+        for _ in range(max(1, int(opts["queries"]))):
+            h = rnd.choice(hashes)
+            for bit in rnd.sample(range(64), rnd.randint(0, max_dist)):
+                h ^= 1 << bit
+            queries.append(h)
+
+        started = time.perf_counter()
+        buckets = defaultdict(list)
+        for ev, h in enumerate(hashes):
+            buckets[(h >> 48) & 0xFFFF].append((ev, h))
+        prefix_build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = SimHashIndex(max_dist)
+        for ev, h in enumerate(hashes):
+            index.add(h, ev)
+        index_build = time.perf_counter() - started
+
+        # ground truth on a sample: the linear scan is slow
+        truth = [scan_nearest(hashes, q, max_dist) for q in queries[:200]]
+        self.stdout.write(
+            f"{n_events} events, {len(queries)} queries, max_dist={max_dist}, bands={index.n_bands}"
+        )
+
+        for name, build_s, lookup in (
+            ("prefix16", prefix_build, lambda q: prefix_nearest(buckets, q, max_dist)),
+            ("banded", index_build, index.nearest),
+        ):
+            started = time.perf_counter()
+            found = [lookup(q) for q in queries]
+            took = time.perf_counter() - started
+            # every query was made within max_dist of an event: a miss is a lost match
+            hits = sum(1 for ev in found if ev is not None)
+            # nearest = same distance as the linear scan's answer (ties may pick another event)
+            nearest = sum(
+                1 for q, ev, want in zip(queries, found, truth)
+                if ev is not None and hamming64(hashes[ev], q) == hamming64(hashes[want], q)
+            )
+            self.stdout.write(
+                f"{name:9s} recall {hits / len(queries):7.2%}  nearest {nearest / len(truth):7.2%}  "
+                f"build {build_s * 1000:8.1f}ms  lookup {took / len(queries) * 1e6:8.1f}us/query"
+            )
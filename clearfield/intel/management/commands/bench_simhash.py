@@ -0,0 +1,63 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from intel.models import Article
+from intel.simhash import simhash64, simhash64_batch, tokenize
+
+
+class Command(BaseCommand):
+    help = "Benchmark simhash64 (per document) against simhash64_batch and check they agree bit for bit"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--docs", type=int, default=2000)
+        parser.add_argument("--tokens", type=int, default=800, help="Tokens per synthetic document")
+        parser.add_argument("--vocab", type=int, default=30000, help="Synthetic vocabulary size")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--from-db", action="store_true", help="Use the newest Article texts instead")
+        parser.add_argument("--repeat", type=int, default=1, help="Best of N timings")
+
+    def handle(self, *args, **opts):
+        docs = self.load_docs(opts)
+        if not docs:
+            raise CommandError("No documents to hash")
+        n_tokens = sum(len(d) for d in docs)
+        self.stdout.write(f"{len(docs)} docs, {n_tokens} tokens, {len({t for d in docs for t in d})} distinct")
+
+        repeat = max(1, int(opts["repeat"]))
+        scalar_s, ref = self.best_of(repeat, lambda: [simhash64(d) for d in docs])
+        batch_s, out = self.best_of(repeat, lambda: simhash64_batch(docs))
+
+        if out != ref:
+            bad = sum(1 for a, b in zip(out, ref) if a != b)
+            raise CommandError(f"simhash64_batch differs from simhash64 on {bad} docs")
+
+        self.stdout.write(f"simhash64       {scalar_s:8.3f}s  ({n_tokens / scalar_s / 1e6:.2f}M tokens/s)")
+        self.stdout.write(f"simhash64_batch {batch_s:8.3f}s  ({n_tokens / batch_s / 1e6:.2f}M tokens/s)")
+        self.stdout.write(self.style.SUCCESS(f"Identical fingerprints, speedup x{scalar_s / batch_s:.1f}"))
+
+    def load_docs(self, opts) -> list[list[str]]:
+        if opts["from_db"]:
+            texts = (
+                Article.objects.exclude(text="")
+                .order_by("-id")
+                .values_list("text", flat=True)[: int(opts["docs"])]
+            )
+            return [tokenize(t) for t in texts]
+
+        # Zipf-ish word frequencies, like real text: a few very common tokens, a long tail
+        rnd = random.Random(int(opts["seed"]))
+        vocab = [f"w{i}" for i in range(max(1, int(opts["vocab"])))]
+        weights = [1.0 / (i + 1) for i in range(len(vocab))]
+        return [rnd.choices(vocab, weights, k=int(opts["tokens"])) for _ in range(int(opts["docs"]))]
+
+    @staticmethod
+    def best_of(repeat: int, fn):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            took = time.perf_counter() - started
+            best = took if best is None else min(best, took)
+        return best, result
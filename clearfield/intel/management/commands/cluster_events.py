@@ -1,91 +1,50 @@
 # clearfield/intel/management/commands/cluster_events.py
 from __future__ import annotations
 
-import hashlib
-import re
-from collections import defaultdict
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models import Q
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 
-from intel.models import Article, Event, EventItem, RawItem
+from intel.models import Article, Event, EventItem, RawItem, Watermark
+from intel.priority import refresh_event_priorities
+from intel.simhash import (
+    SimHashIndex,
+    band_keys,
+    from_signed64,
+    sanitize,
+    sh64_key,
+    simhash64_batch,
+    to_signed64,
+    tokenize,
+)
 
 
-# -----------------------------
-# Text cleanup / tokenization
-# -----------------------------
-NOISE_PHRASES = [
-    "One of your browser extensions seems to be blocking the video player",
-    "To watch this content, you may need to disable it on this site",
-    "Follow our liveblog",
-    "for all the latest developments.",
-    "for all the latest updates.",
-    "from loading.",
-    "from loading. .",
-    "from loading. . from loading.",
-]
-
-NOISE_RE = [
-    r"\bLive:\s*",
-    r"\bFollow (our )?liveblog.*$",
-    r"\bfrom loading\.(\s*\.)*",
-]
-
-WORD_RE = re.compile(r"[a-zA-Z0-9]+", re.UNICODE)
-
-
-def sanitize(text: str) -> str:
-    t = (text or "").strip()
-    for p in NOISE_PHRASES:
-        t = t.replace(p, " ")
-    for rx in NOISE_RE:
-        t = re.sub(rx, " ", t, flags=re.IGNORECASE)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
-
-
-def tokenize(text: str) -> List[str]:
-    # Lower + keep only word-ish tokens
-    t = sanitize(text).lower()
-    return WORD_RE.findall(t)
-
+# Event.sh_band0..3: 16-bit bands stored per event; a DB band lookup finds every
+# event within max_dist <= EVENT_BANDS - 1 (pigeonhole, see SimHashIndex)
+EVENT_BANDS = 4
+# band values per query when fetching candidate events
+EVENT_BAND_CHUNK = 500
 
-# -----------------------------
-# SimHash (64-bit)
-# -----------------------------
-def _hash64(token: str) -> int:
-    # Stable 64-bit from md5 (fast + stable)
-    h = hashlib.md5(token.encode("utf-8")).digest()
-    return int.from_bytes(h[:8], byteorder="big", signed=False)
+# incremental runs (Watermark row) re-read this much before the previous run's start
+WATERMARK_NAME = "cluster_events"
+WATERMARK_OVERLAP = timedelta(minutes=10)
 
+# rows per bulk INSERT/UPDATE when writing events and links
+WRITE_CHUNK = 500
 
-def simhash64(tokens: Iterable[str]) -> int:
-    # Classic SimHash: signed bit weights
-    v = [0] * 64
-    for tok in tokens:
-        x = _hash64(tok)
-        for i in range(64):
-            bit = (x >> i) & 1
-            v[i] += 1 if bit else -1
-    out = 0
-    for i in range(64):
-        if v[i] >= 0:
-            out |= (1 << i)
-    return out
 
-
-def hamming64(a: int, b: int) -> int:
-    return (a ^ b).bit_count()
-
-
-def sh64_key(h: int) -> str:
-    # compact stable cluster key
-    return f"sh64:{h:016x}"
+def event_simhash_fields(h: int) -> Dict[str, int]:
+    """Event.simhash + Event.sh_band0..3 for a fingerprint."""
+    fields = {"simhash": to_signed64(h)}
+    for i, value in band_keys(h, EVENT_BANDS):
+        fields[f"sh_band{i}"] = value
+    return fields
 
 
 # -----------------------------
@@ -118,6 +77,118 @@ def best_text(raw: RawItem, art: Optional[Article]) -> str:
     return " ".join([raw.title or "", raw.summary or "", raw.url or ""]).strip()
 
 
+def enrich(ev: Event, c: Candidate) -> bool:
+    # Lightweight enrichment (don’t thrash fields); True if anything changed
+    changed = False
+    if c.region and not ev.region:
+        ev.region = c.region
+        changed = True
+    if c.topic and not ev.topic:
+        ev.topic = c.topic
+        changed = True
+    if c.title and (not ev.title or len(ev.title) < 20) and len(c.title) > len(ev.title or ""):
+        ev.title = c.title
+        changed = True
+    return changed
+
+
+def create_events(events: List[Event]) -> Tuple[int, List[Event]]:
+    """
+    bulk_create new events and set their pk (MySQL doesn't return ids from bulk inserts).
+    Keys that already exist are reused, like get_or_create: the stored title/region/topic
+    are enriched with what this run gathered. Returns (created, reused events that changed),
+    the latter for the caller's bulk_update.
+    """
+    created = 0
+    changed: List[Event] = []
+    for i in range(0, len(events), WRITE_CHUNK):
+        chunk = events[i:i + WRITE_CHUNK]
+        keys = [ev.cluster_key for ev in chunk]
+        existing = {
+            ev.cluster_key: ev
+            for ev in Event.objects.filter(cluster_key__in=keys).only("id", "cluster_key", "title", "region", "topic")
+        }
+        fresh = [ev for ev in chunk if ev.cluster_key not in existing]
+        # ignore_conflicts: a concurrent run may insert the same key meanwhile
+        Event.objects.bulk_create(fresh, ignore_conflicts=True)
+        created += len(fresh)
+
+        ids = dict(Event.objects.filter(cluster_key__in=keys).values_list("cluster_key", "id"))
+        for ev in chunk:
+            ev.pk = ids[ev.cluster_key]
+            ev._state.adding = False
+            stored = existing.get(ev.cluster_key)
+            if stored is not None:
+                # start from the stored row, then apply this run's fields the way enrich() does
+                gathered = Candidate(raw_id=0, simh=0, title=ev.title, region=ev.region, topic=ev.topic)
+                ev.title, ev.region, ev.topic = stored.title, stored.region, stored.topic
+                if enrich(ev, gathered):
+                    changed.append(ev)
+    return created, changed
+
+
+class QueryCounter:
+    """connection.execute_wrapper() hook counting SQL statements (works without DEBUG)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def load_candidate_events(hashes: List[int], max_dist: int) -> List[Event]:
+    """
+    Events that may lie within max_dist of any of `hashes`, in id order: one indexed
+    sh_band<i> IN (...) query per band and chunk instead of loading every event.
+    """
+    qs = (
+        Event.objects.filter(simhash__isnull=False)
+        .only("id", "cluster_key", "title", "region", "topic", "evidence_level", "simhash")
+    )
+    if max_dist >= EVENT_BANDS:
+        # the stored bands can't guarantee recall that far: scan everything
+        return list(qs.order_by("id"))
+
+    band_values: List[set] = [set() for _ in range(EVENT_BANDS)]
+    for h in hashes:
+        for i, value in band_keys(h, EVENT_BANDS):
+            band_values[i].add(value)
+
+    found: Dict[int, Event] = {}
+    for i, values in enumerate(band_values):
+        values = sorted(values)
+        for j in range(0, len(values), EVENT_BAND_CHUNK):
+            for ev in qs.filter(**{f"sh_band{i}__in": values[j:j + EVENT_BAND_CHUNK]}):
+                found[ev.id] = ev
+    return [found[k] for k in sorted(found)]
+
+
+def link_near_dups(raw_items: List[RawItem]) -> Tuple[set, set]:
+    """
+    Items flagged at ingest as near-duplicates (RawItem.dup_of) usually have no article
+    text yet: link them to their representative's event.
+    Returns (linked_item_ids, touched_event_ids).
+    """
+    dups = {r.id: r.dup_of_id for r in raw_items if r.dup_of_id}
+    if not dups:
+        return set(), set()
+
+    already = set(EventItem.objects.filter(item_id__in=list(dups)).values_list("item_id", flat=True))
+    event_by_rep = dict(
+        EventItem.objects.filter(item_id__in=set(dups.values())).values_list("item_id", "event_id")
+    )
+    links = [
+        EventItem(event_id=event_by_rep[rep_id], item_id=item_id)
+        for item_id, rep_id in dups.items()
+        if item_id not in already and rep_id in event_by_rep
+    ]
+    # ignore_conflicts: EventItem.item is unique, a concurrent run may have linked it
+    EventItem.objects.bulk_create(links, ignore_conflicts=True)
+    return {ei.item_id for ei in links}, {ei.event_id for ei in links}
+
+
 @dataclass
 class Candidate:
     raw_id: int
@@ -136,50 +207,134 @@ class Command(BaseCommand):
         parser.add_argument("--max-dist", type=int, default=3)
         # Compatibility alias (optional UX): allow --hours same as --since-hours
         parser.add_argument("--hours", type=int, default=None)
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignore the watermark: reconsider every unlinked item in the window",
+        )
 
     def handle(self, *args, **opts):
         since_hours = opts["since_hours"]
         if opts.get("hours") is not None:
             since_hours = int(opts["hours"])
 
-        limit = int(opts["limit"])
-        max_dist = int(opts["max_dist"])
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            events_upserted, items_linked, _ = self.cluster(
+                since_hours=since_hours,
+                limit=int(opts["limit"]),
+                max_dist=int(opts["max_dist"]),
+                incremental=not opts["full"],
+            )
+        self.stdout.write(
+            f"Events upserted: {events_upserted}, items linked: {items_linked} ({queries.count} queries)"
+        )
 
-        since = timezone.now() - timedelta(hours=since_hours)
+    def cluster(
+        self,
+        since_hours: int,
+        limit: int,
+        max_dist: int,
+        incremental: bool = False,
+    ) -> Tuple[int, int, set]:
+        """
+        Link unlinked window items to events. incremental restricts candidates to items
+        created, extracted or whose representative got linked since the last incremental
+        run (Watermark), oldest arrival first.
+        Returns (events_upserted, items_linked, touched_event_ids).
+        """
+        now = timezone.now()
+        since = now - timedelta(hours=since_hours)
 
         # IMPORTANT: window by published_at (fallback to created_at if published_at is null)
         raw_qs = (
             RawItem.objects.filter(
                 Q(published_at__gte=since)
-                | Q(published_at__isnull=True, created_at__gte=since)
+                | Q(published_at__isnull=True, created_at__gte=since),
+                event_item__isnull=True,
             )
+            .select_related("source")
             .order_by("-published_at", "-created_at")
         )
 
+        mark = None
+        if incremental:
+            # arrival = the latest of created / extracted / representative linked;
+            # oldest arrivals first so a --limit batch never skips past them
+            raw_qs = raw_qs.annotate(
+                arrived=Greatest(
+                    "created_at",
+                    Coalesce("article__extracted_at", "created_at"),
+                    Coalesce("dup_of__event_item__created_at", "created_at"),
+                )
+            ).order_by("arrived", "id")
+            mark = Watermark.objects.filter(name=WATERMARK_NAME).first()
+        if mark is not None:
+            # overlap: rows committed late by a concurrent ingest/extract are not lost
+            raw_qs = raw_qs.filter(arrived__gte=mark.value - WATERMARK_OVERLAP)
+
         if limit:
             raw_qs = raw_qs[:limit]
 
         raw_items: List[RawItem] = list(raw_qs)
+        result = self.link_items(raw_items, max_dist)
+
+        if incremental:
+            # a truncated batch only covers arrivals up to its last item: the next run
+            # resumes there instead of starting over from the newest items
+            truncated = limit and len(raw_items) >= limit
+            value = raw_items[-1].arrived if truncated else now
+            if truncated and mark is not None and value <= mark.value:
+                # the whole batch sat inside the overlap (items that stay unlinked):
+                # step past it, otherwise the same batch is selected forever
+                value += WATERMARK_OVERLAP
+            Watermark.objects.update_or_create(name=WATERMARK_NAME, defaults={"value": value})
+
+        return result
+
+    def link_items(self, raw_items: List[RawItem], max_dist: int) -> Tuple[int, int, set]:
         if not raw_items:
-            self.stdout.write("Events upserted: 0, items linked: 0")
-            return
+            return 0, 0, set()
+
+        # near-duplicates join their representative's event without a SimHash of their own
+        dup_linked, dup_touched = link_near_dups(raw_items)
+        raw_items = [r for r in raw_items if r.id not in dup_linked]
 
         raw_ids = [r.id for r in raw_items]
 
-        # Pull Article for these items (1:1 by item)
-        arts = Article.objects.filter(item_id__in=raw_ids)
+        # Pull Article for these items (1:1 by item); simhash/token_count were
+        # computed at extraction time, so the text is only loaded for rows that lack them
+        arts = Article.objects.filter(item_id__in=raw_ids).only(
+            "item_id", "title", "clean_len", "token_count", "simhash"
+        )
         art_by_item: Dict[int, Article] = {a.item_id: a for a in arts}
+        text_by_item: Dict[int, str] = dict(
+            Article.objects.filter(item_id__in=[a.item_id for a in art_by_item.values() if a.token_count is None])
+            .values_list("item_id", "text")
+        )
 
         # Build candidates
         cands: List[Candidate] = []
+        # candidates without a stored simhash: hashed together below
+        pending: List[Tuple[Candidate, List[str]]] = []
         for r in raw_items:
             a = art_by_item.get(r.id)
-            txt = best_text(r, a)
-            toks = tokenize(txt)
-            if len(toks) < 30:
-                # Too little signal; skip
-                continue
-            h = simhash64(toks)
+            toks = None
+            if a is not None and a.token_count is not None and a.clean_len:
+                if a.token_count < 30 or a.simhash is None:
+                    # Too little signal; skip
+                    continue
+                h = from_signed64(a.simhash)
+            else:
+                # no article / empty text / features not backfilled yet
+                if a is not None:
+                    a.text = text_by_item.get(r.id, "")
+                txt = best_text(r, a)
+                toks = tokenize(txt)
+                if len(toks) < 30:
+                    # Too little signal; skip
+                    continue
+                h = 0
             region, topic = pick_region_topic(r)
             cands.append(
                 Candidate(
@@ -190,99 +345,87 @@ class Command(BaseCommand):
                     topic=topic,
                 )
             )
+            if toks is not None:
+                pending.append((cands[-1], toks))
 
-        if not cands:
-            self.stdout.write("Events upserted: 0, items linked: 0")
-            return
+        for (c, _), h in zip(pending, simhash64_batch([toks for _, toks in pending])):
+            c.simh = h
 
-        # Naive clustering: bucket by prefix to reduce comparisons
-        # (prefix = top 16 bits)
-        buckets: Dict[int, List[Candidate]] = defaultdict(list)
-        for c in cands:
-            prefix = (c.simh >> 48) & 0xFFFF
-            buckets[prefix].append(c)
+        if not cands:
+            return 0, len(dup_linked), dup_touched
 
         # Fetch existing EventItem links to avoid relinking / integrity errors
+        # (the query above skips linked items; this covers a concurrent run)
         already_linked = set(
             EventItem.objects.filter(item_id__in=[c.raw_id for c in cands])
             .values_list("item_id", flat=True)
         )
 
         events_upserted = 0
-        items_linked = 0
+        items_linked = len(dup_linked)
+        touched_event_ids = set(dup_touched)
 
-        # Load existing events for potential matches inside same prefix
-        # We match by hamming distance on simhash embedded in cluster_key "sh64:..."
+        # Load existing events for potential matches: only those sharing a band with the batch
+        # We match by hamming distance on Event.simhash (same bits as cluster_key "sh64:...")
         # Note: This uses deterministic cluster keys (exact simhash). We still allow "near" match.
-        existing_events = list(Event.objects.all().only("id", "cluster_key", "title", "region", "topic", "evidence_level"))
-        existing_by_prefix: Dict[int, List[Tuple[Event, int]]] = defaultdict(list)
-        for ev in existing_events:
-            ck = ev.cluster_key or ""
-            if ck.startswith("sh64:"):
-                try:
-                    h = int(ck.split(":", 1)[1], 16)
-                except Exception:
-                    continue
-                prefix = (h >> 48) & 0xFFFF
-                existing_by_prefix[prefix].append((ev, h))
-
-        @transaction.atomic
-        def upsert_one(c: Candidate):
-            nonlocal events_upserted, items_linked
-
+        index = SimHashIndex(max_dist)
+        for ev in load_candidate_events([c.simh for c in cands], max_dist):
+            index.add(from_signed64(ev.simhash), ev)
+
+        # Phase 1: assign every candidate to an event in memory; new events are
+        # unsaved Event objects, indexed right away so later candidates can join them
+        new_events: Dict[str, Event] = {}
+        enriched: Dict[int, Event] = {}
+        links: List[Tuple[Event, int]] = []
+        for c in cands:
             if c.raw_id in already_linked:
-                return
-
-            prefix = (c.simh >> 48) & 0xFFFF
-
-            # Find nearest existing event in same prefix by hamming distance
-            best_ev = None
-            best_d = 10**9
-            for ev, h in existing_by_prefix.get(prefix, []):
-                d = hamming64(c.simh, h)
-                if d < best_d:
-                    best_d = d
-                    best_ev = ev
-
-            if best_ev is not None and best_d <= max_dist:
-                ev = best_ev
-                created = False
-            else:
-                # Create new event with deterministic key = exact simhash
-                key = sh64_key(c.simh)
-                ev, created = Event.objects.get_or_create(
-                    cluster_key=key,
-                    defaults=dict(
-                        title=c.title,
-                        summary="",
-                        region=c.region,
-                        topic=c.topic,
-                        evidence_level=1,
-                    ),
+                continue
+
+            # Nearest existing event within max_dist (hamming distance)
+            ev = index.nearest(c.simh)
+            if ev is None:
+                # New event with deterministic key = exact simhash
+                ev = Event(
+                    cluster_key=sh64_key(c.simh),
+                    title=c.title,
+                    summary="",
+                    region=c.region,
+                    topic=c.topic,
+                    evidence_level=1,
+                    **event_simhash_fields(c.simh),
                 )
-                if created:
-                    events_upserted += 1
-                    existing_by_prefix[prefix].append((ev, c.simh))
-
-            # Lightweight enrichment (don’t thrash fields)
-            changed = False
-            if c.region and not ev.region:
-                ev.region = c.region
-                changed = True
-            if c.topic and not ev.topic:
-                ev.topic = c.topic
-                changed = True
-            if c.title and (not ev.title or len(ev.title) < 20) and len(c.title) > len(ev.title or ""):
-                ev.title = c.title
-                changed = True
-            if changed:
-                ev.save(update_fields=["title", "region", "topic", "updated_at"])
+                new_events[ev.cluster_key] = ev
+                index.add(c.simh, ev)
 
+            if enrich(ev, c) and ev.pk is not None:
+                enriched[ev.pk] = ev
             # Link item to event (1:1 on item)
-            EventItem.objects.create(event=ev, item_id=c.raw_id)
-            items_linked += 1
+            links.append((ev, c.raw_id))
+
+        # Phase 2: chunked bulk writes in one transaction
+        with transaction.atomic():
+            created, reused = create_events(list(new_events.values()))
+            events_upserted += created
+            for ev in reused:
+                enriched[ev.pk] = ev
+
+            now = timezone.now()
+            for ev in enriched.values():
+                ev.updated_at = now
+            Event.objects.bulk_update(
+                list(enriched.values()), ["title", "region", "topic", "updated_at"], batch_size=WRITE_CHUNK
+            )
 
-        for c in cands:
-            upsert_one(c)
+            # ignore_conflicts: EventItem.item is unique, a concurrent run may have linked it
+            EventItem.objects.bulk_create(
+                [EventItem(event_id=ev.pk, item_id=item_id) for ev, item_id in links],
+                batch_size=WRITE_CHUNK,
+                ignore_conflicts=True,
+            )
+        items_linked += len(links)
+        touched_event_ids.update(ev.pk for ev, _ in links)
+
+        # growing events pull their not-yet-extracted items up the extraction queue
+        refresh_event_priorities(touched_event_ids)
 
-        self.stdout.write(f"Events upserted: {events_upserted}, items linked: {items_linked}")
+        return events_upserted, items_linked, touched_event_ids
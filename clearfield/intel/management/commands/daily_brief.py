@@ -10,10 +10,6 @@ from django.utils import timezone
 from intel.models import Event
 
 
-# корректно завершаемся при пайпах в head|tail
-signal.signal(signal.SIGPIPE, signal.SIG_DFL)
-
-
 TITLE_CLEAN_RE = [
     (re.compile(r"^\s*Live:\s*", re.IGNORECASE), ""),  # "Live: ..."
     (re.compile(r"\s+", re.UNICODE), " "),             # collapse spaces
@@ -51,8 +47,13 @@ class Command(BaseCommand):
         parser.add_argument("--min-evidence", type=int, default=1)
 
     def handle(self, *args, **opts):
-        hours = int(opts["hours"])
-        min_evidence = int(opts["min_evidence"])
+        # корректно завершаемся при пайпах в head|tail
+        signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+
+        self.render(self.stdout, hours=int(opts["hours"]), min_evidence=int(opts["min_evidence"]))
+
+    def render(self, out, hours: int, min_evidence: int) -> int:
+        """Write the brief to `out` (anything with .write); returns the number of events shown."""
         since = timezone.now() - timedelta(hours=hours)
 
         qs = (
@@ -61,8 +62,13 @@ class Command(BaseCommand):
             .order_by("evidence_level", "-updated_at")
         )
 
-        self.stdout.write(brief_header(hours))
+        def line(text: str = ""):
+            # explicit newline: works for both OutputWrapper and plain files
+            out.write(text + "\n")
+
+        line(brief_header(hours))
 
+        shown = 0
         for ev in qs:
             title = clean_title(ev.title or "")
             summary = clean_summary(ev.summary or "")
@@ -74,9 +80,12 @@ class Command(BaseCommand):
             if not title:
                 title = f"Event {ev.id}"
 
-            self.stdout.write(f"## L{ev.evidence_level} — {title}")
-            self.stdout.write(summary)
-            self.stdout.write("")
-            self.stdout.write(f"- Region: `{ev.region or ''}`  Topic: `{ev.topic or ''}`")
-            self.stdout.write(f"- Cluster: `{ev.cluster_key or ''}`")
-            self.stdout.write("")
+            line(f"## L{ev.evidence_level} — {title}")
+            line(summary)
+            line("")
+            line(f"- Region: `{ev.region or ''}`  Topic: `{ev.topic or ''}`")
+            line(f"- Cluster: `{ev.cluster_key or ''}`")
+            line("")
+            shown += 1
+
+        return shown
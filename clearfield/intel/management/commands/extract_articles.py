@@ -1,15 +1,43 @@
 import asyncio
+import os
+import signal
 import time
-from dataclasses import dataclass
+from collections import defaultdict
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
 
 import aiohttp
 import trafilatura
 from trafilatura.core import bare_extraction
 from asgiref.sync import sync_to_async
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-from intel.models import RawItem, Article
+from intel.fetching import (
+    ARTICLE_ALLOWED_TYPES,
+    ARTICLE_MAX_BYTES,
+    THROTTLE_DEFAULT_DELAY,
+    HostSkipped,
+    HostThrottled,
+    HttpStatusError,
+    PoliteLimiter,
+    ResponseAborted,
+    check_content_type,
+    decode_body,
+    raise_for_throttle,
+    read_capped,
+)
+from intel.canonical import canonical_key
+from intel.dbutil import recycle_connections
+from intel.htmlcache import HtmlCache, url_key
+from intel.models import RawItem, Article, CachedPage, ExtractErrorClass
+from intel.textfeatures import FEATURE_FIELDS, text_features
 
 
 # =========================
@@ -19,6 +47,38 @@ UA = "CLEARFIELD/0.1 (+https://github.com/Joker20380/clearfield)"
 ACCEPT = "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
 ACCEPT_LANG = "en-US,en;q=0.9,ru;q=0.8"
 
+# per-publisher politeness
+DEFAULT_PER_HOST = 2
+DEFAULT_HOST_RATE = 1.0  # requests/second per host
+DEFAULT_HOST_BURST = 3
+# a host asking us to wait longer than this is skipped for this run
+RETRY_AFTER_MAX = 300.0
+
+# retry queue for transient failures: base * 2^(attempts-1), capped; give up after MAX_ATTEMPTS
+RETRY_BASE = timedelta(minutes=15)
+RETRY_MAX_DELAY = timedelta(hours=24)
+MAX_ATTEMPTS = 5
+# share of each pick reserved for due retries, so a steady stream of fresh items cannot starve them
+RETRY_SHARE = 0.2
+# 4xx that are worth retrying
+TRANSIENT_4XX = (408, 425, 429)
+
+# --follow: DB poll when there was nothing to pick, heartbeat line period (seconds)
+FOLLOW_POLL_INTERVAL = 10.0
+FOLLOW_HEARTBEAT = 30.0
+# download consumer tasks per download slot (see Command.run)
+DOWNLOADERS_PER_SLOT = 2
+
+# article writer: rows per upsert statement / flush
+WRITE_BATCH = 100
+WRITE_MAX_DELAY = 0.5  # seconds
+# a failed batch is retried on fresh connections this many times before the writer gives up
+WRITE_RETRIES = 2
+WRITE_RETRY_DELAY = 1.0  # seconds, times the attempt number
+
+# trafilatura is CPU-bound: one process per core, capped
+DEFAULT_EXTRACT_WORKERS = min(4, os.cpu_count() or 1)
+
 
 # =========================
 # DTO
@@ -31,52 +91,341 @@ class ExtractResult:
     text: str = ""
     lang: str = ""
     error: str = ""
+    error_class: str = ExtractErrorClass.NONE
+    retry_after: float | None = None
+    # set when the raw HTML went into the cache
+    html_sha256: str = ""
+    html_size: int = 0
+    stored_size: int = 0
+    # Article.clean_len/token_count/simhash/is_placeholder (intel.textfeatures)
+    features: dict | None = None
+
+
+@dataclass
+class RunStats:
+    picked: int = 0
+    reused: int = 0
+    downloads: int = 0
+    downloads_saved: int = 0
+    download_ms: int = 0
+    extracted: int = 0
+    extract_ms: int = 0
+    done: int = 0
+
+
+def classify_error(exc: Exception) -> str:
+    """Permanent: the same request would fail the same way (4xx, wrong type/size). Anything else is transient."""
+    if isinstance(exc, ResponseAborted):
+        return ExtractErrorClass.PERMANENT
+    if isinstance(exc, HttpStatusError) and 400 <= exc.status < 500 and exc.status not in TRANSIENT_4XX:
+        return ExtractErrorClass.PERMANENT
+    return ExtractErrorClass.TRANSIENT
+
+
+def next_attempt_time(attempts: int, retry_after: float | None = None):
+    """When a transiently failed item is due again, or None once it ran out of attempts."""
+    if attempts >= MAX_ATTEMPTS:
+        return None
+    delay = min(RETRY_BASE * 2 ** max(0, attempts - 1), RETRY_MAX_DELAY)
+    if retry_after is not None:
+        delay = max(delay, timedelta(seconds=retry_after))
+    return timezone.now() + delay
 
 
 # =========================
 # DB helpers (sync ORM)
 # =========================
 @sync_to_async
-def pick_items(limit: int):
+def pick_items(
+    limit: int,
+    retries_only: bool = False,
+    exclude_ids: set[int] | None = None,
+):
     """
-    Берём RawItem без Article, свежие сначала
+    Берём RawItem без Article (по extract_priority, затем свежие) и ретраи, у которых
+    подошёл next_attempt_at (по индексу, самые старые первыми):
+    RETRY_SHARE лимита зарезервировано под ретраи, неиспользованное отдаётся свежим;
+    ретраи идут раньше near-duplicate (отрицательный extract_priority).
+    exclude_ids: уже в работе (--follow).
+    Each item carries prev_attempts for article_fields().
     """
-    qs = (
-        RawItem.objects
-        .filter(article__isnull=True)
-        .exclude(url="")
-        .order_by("-published_at", "-created_at")[:limit]
-    )
-    return list(qs)
+    base = RawItem.objects.exclude(url="").annotate(prev_attempts=Coalesce(F("article__attempts"), Value(0)))
+    if exclude_ids:
+        base = base.exclude(id__in=list(exclude_ids))
 
+    due = base.filter(article__next_attempt_at__lte=timezone.now()).order_by("article__next_attempt_at", "id")
+    if retries_only:
+        return list(due[:limit])
 
-@sync_to_async
-def save_article(item_id: int, res: ExtractResult):
+    # reads the top of the rawitem_extract_queue index; article__isnull is a cheap per-row check
+    fresh = base.filter(extract_priority__isnull=False, article__isnull=True).order_by("-extract_priority", "-published_at")
+
+    reserved = min(limit, max(1, int(limit * RETRY_SHARE)))
+    items = list(due[:reserved])
+    n_due = len(items)
+    items += list(fresh.filter(extract_priority__gte=0)[: limit - len(items)])
+    if len(items) < limit and n_due == reserved:
+        items += list(due[n_due: n_due + limit - len(items)])
+    if len(items) < limit:
+        items += list(fresh.filter(extract_priority__lt=0)[: limit - len(items)])
+    return items
+
+
+def article_fields(item: RawItem, res: ExtractResult) -> dict:
+    """
+    Article columns for this result; transient failures get the next retry slot
     """
-    Создаём или обновляем Article
+    attempts = getattr(item, "prev_attempts", 0) + 1
+    error_class = ExtractErrorClass.NONE if res.ok else (res.error_class or ExtractErrorClass.TRANSIENT)
+    next_at = None
+    if error_class == ExtractErrorClass.TRANSIENT:
+        next_at = next_attempt_time(attempts, res.retry_after)
+
+    fields = {
+        "final_url": res.final_url,
+        "extracted_at": timezone.now(),
+        "extract_error": "" if res.ok else res.error,
+        "attempts": attempts,
+        "error_class": error_class,
+        "next_attempt_at": next_at,
+    }
+    # a failed retry keeps whatever text an earlier attempt may have stored
+    if res.ok or attempts == 1:
+        fields.update(title=res.title, text=res.text, lang=res.lang)
+        fields.update(res.features if res.features is not None else text_features(res.text))
+    if res.html_sha256:
+        fields["html_sha256"] = res.html_sha256
+    return fields
+
+
+def upsert_kwargs(unique_field: str, update_fields: list[str]) -> dict:
+    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target; Postgres/SQLite require one
+    kwargs = {"update_conflicts": True, "update_fields": update_fields}
+    if connection.features.supports_update_conflicts_with_target:
+        kwargs["unique_fields"] = [unique_field]
+    return kwargs
+
+
+def write_articles(rows: list[tuple[RawItem, ExtractResult]]):
     """
-    Article.objects.update_or_create(
-        item_id=item_id,
-        defaults={
-            "final_url": res.final_url,
-            "title": res.title,
-            "text": res.text,
-            "lang": res.lang,
-            "extracted_at": timezone.now(),
-            "extract_error": "" if res.ok else res.error,
-        },
+    One transaction per batch: Articles upserted by item_id (INSERT ... ON CONFLICT/DUPLICATE KEY UPDATE,
+    no per-row SELECT), plus the CachedPage rows of pages stored in this batch; the items leave
+    the extract_priority queue.
+    """
+    # rows touching different column sets can't share one upsert statement
+    by_fields: dict[tuple, list[Article]] = defaultdict(list)
+    pages: dict[str, CachedPage] = {}
+    for item, res in rows:
+        fields = article_fields(item, res)
+        by_fields[tuple(sorted(fields))].append(Article(item_id=item.id, **fields))
+        if res.stored_size:
+            # only the item whose download stored the page updates the URL index
+            key = url_key(res.final_url)
+            pages[key] = CachedPage(
+                url_key=key,
+                final_url=res.final_url,
+                sha256=res.html_sha256,
+                size=res.html_size,
+                stored_size=res.stored_size,
+                fetched_at=timezone.now(),
+            )
+
+    with transaction.atomic():
+        # written (ok or not): off the fresh queue; failures continue via Article.next_attempt_at
+        RawItem.objects.filter(id__in=[item.id for item, _ in rows], extract_priority__isnull=False).update(
+            extract_priority=None
+        )
+        for fields, objs in by_fields.items():
+            Article.objects.bulk_create(objs, batch_size=WRITE_BATCH, **upsert_kwargs("item", list(fields)))
+        if pages:
+            CachedPage.objects.bulk_create(
+                list(pages.values()),
+                batch_size=WRITE_BATCH,
+                **upsert_kwargs("url_key", ["final_url", "sha256", "size", "stored_size", "fetched_at"]),
+            )
+
+
+class ArticleWriter:
+    """
+    Background writer: results queue up and are written by write_articles() every
+    `batch_size` rows or `max_delay` seconds. The queue is bounded, so when the DB
+    falls behind put() blocks, and that stalls extraction and downloads behind it.
+    A batch that still fails after `retries` reconnects is fatal: on_error is called,
+    later batches are dropped and close() re-raises.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        max_delay: float = 0.5,
+        max_pending: int | None = None,
+        on_written=None,
+        on_error=None,
+        log=None,
+        retries: int = WRITE_RETRIES,
+    ):
+        self.batch_size = max(1, batch_size)
+        # called with the item ids of each batch once it is committed
+        self.on_written = on_written
+        # called once with the exception that stopped the writer
+        self.on_error = on_error
+        self.log = log
+        self.retries = max(0, retries)
+        self.max_delay = max_delay
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending or self.batch_size * 2)
+        self._task: asyncio.Task | None = None
+        self.written = 0
+        self.flushes = 0
+        self.write_ms = 0
+        self.error: Exception | None = None
+        self.dropped = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def put(self, item: RawItem, res: ExtractResult):
+        await self._queue.put((item, res))
+
+    async def close(self):
+        """Write whatever is pending and stop; re-raises the write error that stopped the writer."""
+        await self._queue.put(None)
+        await self._task
+        if self.error is not None:
+            if self.log is not None:
+                self.log(f"[writer] stopped after a write error, {self.dropped} results not saved")
+            raise self.error
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        batch: list[tuple[RawItem, ExtractResult]] = []
+        deadline = None
+        closing = False
+        while not closing:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                row = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                row = ()
+            if row is None:
+                closing = True
+            elif row:
+                if not batch:
+                    deadline = loop.time() + self.max_delay
+                batch.append(row)
+
+            if batch and (closing or len(batch) >= self.batch_size or loop.time() >= deadline):
+                await self._flush(batch)
+                batch, deadline = [], None
+
+    async def _flush(self, batch: list):
+        if self.error is not None:
+            self.dropped += len(batch)
+            return  # keep draining so producers never block on a dead writer
+        start = time.monotonic()
+        for attempt in range(self.retries + 1):
+            try:
+                await sync_to_async(write_articles)(batch)
+                break
+            except Exception as e:
+                if self.log is not None:
+                    self.log(
+                        f"[writer] batch of {len(batch)} failed "
+                        f"(attempt {attempt + 1}/{self.retries + 1}): {type(e).__name__}: {e}"
+                    )
+                if attempt >= self.retries:
+                    self.error = e
+                    self.dropped += len(batch)
+                    if self.on_error is not None:
+                        self.on_error(e)
+                    return
+                # usually a connection the DB server dropped: reconnect and write the batch again
+                await recycle_connections()
+                await asyncio.sleep(WRITE_RETRY_DELAY * (attempt + 1))
+        self.write_ms += int((time.monotonic() - start) * 1000)
+        self.written += len(batch)
+        self.flushes += 1
+        if self.on_written is not None:
+            self.on_written([item.id for item, _ in batch])
+
+
+def save_reextracted(rows: list[tuple[int, ExtractResult]]):
+    """--from-cache results: text/error only; attempts and the retry queue are left alone."""
+    now = timezone.now()
+    ok, failed = [], []
+    for article_id, res in rows:
+        art = Article(id=article_id, extracted_at=now, extract_error="" if res.ok else res.error)
+        art.error_class = ExtractErrorClass.NONE if res.ok else res.error_class
+        if res.ok:
+            art.title, art.text, art.lang = res.title, res.text, res.lang
+            for name, value in (res.features or text_features(res.text)).items():
+                setattr(art, name, value)
+            ok.append(art)
+        else:
+            # keep the text of the previous (successful) extraction
+            failed.append(art)
+    Article.objects.bulk_update(
+        ok, ["title", "text", "lang", "extracted_at", "extract_error", "error_class", *FEATURE_FIELDS]
     )
+    Article.objects.bulk_update(failed, ["extracted_at", "extract_error", "error_class"])
+
+
+def item_key(item: RawItem) -> str:
+    # rows ingested before canonical_key existed may still be blank
+    return item.canonical_key or canonical_key(item.url)
+
+
+def group_by_canonical(items: list[RawItem]) -> list[list[RawItem]]:
+    """Items sharing a canonical URL, in pick order; the first of each group gets downloaded."""
+    groups: dict[str, list[RawItem]] = {}
+    for it in items:
+        groups.setdefault(item_key(it) or f"id:{it.id}", []).append(it)
+    return list(groups.values())
+
+
+@sync_to_async
+def load_known_articles(keys: list[str]) -> dict[str, ExtractResult]:
+    """Successful extractions from earlier runs for these canonical keys."""
+    rows = (
+        Article.objects
+        .filter(item__canonical_key__in=keys, extract_error="")
+        .exclude(text="")
+        .order_by("-extracted_at")
+        .values_list("item__canonical_key", "final_url", "title", "text", "lang", "html_sha256", *FEATURE_FIELDS)
+    )
+    known = {}
+    for key, final_url, title, text, lang, sha, *features in rows:
+        if key in known:
+            continue
+        res = ExtractResult(ok=True, final_url=final_url, title=title, text=text, lang=lang, html_sha256=sha)
+        features = dict(zip(FEATURE_FIELDS, features))
+        # rows from before the feature columns: article_fields() computes them
+        if features["token_count"] is not None:
+            res.features = features
+        known[key] = res
+    return known
 
 
 # =========================
 # Network + extraction
 # =========================
-async def fetch_html(session: aiohttp.ClientSession, url: str) -> tuple[str, str]:
+async def fetch_html(
+    session: aiohttp.ClientSession,
+    url: str,
+    max_bytes: int = ARTICLE_MAX_BYTES,
+) -> tuple[str, str]:
     async with session.get(url, allow_redirects=True) as resp:
+        raise_for_throttle(resp)
         if resp.status >= 400:
-            raise RuntimeError(f"HTTP {resp.status}")
+            raise HttpStatusError(resp.status)
         final_url = str(resp.url)
-        html = await resp.text(errors="ignore")
+        # video/PDF/etc: stop before downloading the body
+        check_content_type(resp, allowed=ARTICLE_ALLOWED_TYPES)
+        body = await read_capped(resp, max_bytes)
+        html = decode_body(body, resp.charset)
         return final_url, html
 
 
@@ -84,13 +433,16 @@ def extract_from_html(final_url: str, html: str) -> ExtractResult:
     """
     Универсально для разных версий trafilatura:
     bare_extraction может вернуть dict или Document-like объект.
+    Failures here are about the page itself, so they are permanent.
     """
+    PERMANENT = ExtractErrorClass.PERMANENT
+
     if not html or len(html) < 200:
-        return ExtractResult(ok=False, final_url=final_url, error="Empty or too short HTML")
+        return ExtractResult(ok=False, final_url=final_url, error="Empty or too short HTML", error_class=PERMANENT)
 
     data = bare_extraction(html, url=final_url, favor_precision=True)
     if not data:
-        return ExtractResult(ok=False, final_url=final_url, error="bare_extraction returned None")
+        return ExtractResult(ok=False, final_url=final_url, error="bare_extraction returned None", error_class=PERMANENT)
 
     # --- normalize getters (dict vs object) ---
     def pick(field: str) -> str:
@@ -102,39 +454,137 @@ def extract_from_html(final_url: str, html: str) -> ExtractResult:
 
     text = pick("text")
     if len(text) < 200:
-        return ExtractResult(ok=False, final_url=final_url, error="No meaningful text extracted")
+        return ExtractResult(ok=False, final_url=final_url, error="No meaningful text extracted", error_class=PERMANENT)
 
     title = pick("title")
     lang = pick("language")
 
-    return ExtractResult(ok=True, final_url=final_url, title=title, text=text, lang=lang)
+    return ExtractResult(
+        ok=True,
+        final_url=final_url,
+        title=title,
+        text=text,
+        lang=lang,
+        features=text_features(text),
+    )
+
+
+@dataclass
+class Downloaded:
+    item: RawItem
+    final_url: str = ""
+    html: str = ""
+    error: str = ""
+    error_class: str = ExtractErrorClass.NONE
+    retry_after: float | None = None
+    download_ms: int = 0
+    # other items with the same canonical URL: they get the same result
+    followers: list[RawItem] = field(default_factory=list)
 
 
-async def process_one(
+async def download_one(
     session: aiohttp.ClientSession,
+    limiter: PoliteLimiter,
     item: RawItem,
     retries: int,
-) -> ExtractResult:
+    max_bytes: int,
+    deliver,
+    followers: list[RawItem] | None = None,
+):
+    """Download item.url (with retries) and `await deliver(Downloaded)` exactly once."""
+    followers = followers or []
     delay = 1.0
     last_error = None
+    error_class = ExtractErrorClass.TRANSIENT
+    retry_after = None
+    start = time.monotonic()
 
     for attempt in range(retries + 1):
         try:
-            final_url, html = await fetch_html(session, item.url)
-            return extract_from_html(final_url, html)
+            # one slot per attempt: backoff sleeps don't hold the host
+            async with limiter.slot(item.url):
+                final_url, html = await fetch_html(session, item.url, max_bytes)
+                # still holding the slot: a full extract queue holds downloads back
+                await deliver(
+                    Downloaded(
+                        item,
+                        final_url,
+                        html,
+                        download_ms=int((time.monotonic() - start) * 1000),
+                        followers=followers,
+                    )
+                )
+            return
+        except HostSkipped as e:
+            # an earlier response from this host asked for a long pause: no request at all
+            last_error = str(e)
+            retry_after = e.retry_after
+            break
+        except HostThrottled as e:
+            last_error = str(e)
+            wait = THROTTLE_DEFAULT_DELAY if e.retry_after is None else e.retry_after
+            if wait > RETRY_AFTER_MAX:
+                # the retry queue honours it; the host's other items fail fast meanwhile
+                retry_after = wait
+                limiter.skip_host(item.url, wait, e.status)
+                break
+            # the whole host cools down; the next attempt waits in limiter.slot()
+            limiter.cooldown(item.url, wait)
         except Exception as e:
             last_error = str(e)
+            error_class = classify_error(e)
+            if error_class == ExtractErrorClass.PERMANENT:
+                # deterministic: retrying would download the same thing again
+                break
             if attempt < retries:
                 await asyncio.sleep(delay)
                 delay = min(delay * 2, 10.0)
 
-    return ExtractResult(
-        ok=False,
-        final_url=item.url,
-        error=last_error or "Unknown error",
+    await deliver(
+        Downloaded(
+            item,
+            final_url=item.url,
+            error=last_error or "Unknown error",
+            error_class=error_class,
+            retry_after=retry_after,
+            download_ms=int((time.monotonic() - start) * 1000),
+            followers=followers,
+        )
     )
 
 
+def extract_timed(final_url: str, html: str, cache_dir: str = "") -> tuple[ExtractResult, int]:
+    """
+    extract_from_html + its CPU-side duration (runs inside pool workers).
+    With cache_dir the raw HTML is stored first, whatever the extraction outcome.
+    """
+    start = time.monotonic()
+    stored = None
+    if cache_dir:
+        stored = HtmlCache(cache_dir).put(html)
+    res = extract_from_html(final_url, html)
+    if stored:
+        res.html_sha256, res.stored_size = stored
+        res.html_size = len(html.encode("utf-8"))
+    return res, int((time.monotonic() - start) * 1000)
+
+
+def extract_cached(cache_dir: str, digest: str, final_url: str) -> ExtractResult | None:
+    """Re-extract a cached page (pool worker); None if the blob is gone."""
+    try:
+        html = HtmlCache(cache_dir).get(digest)
+    except FileNotFoundError:
+        return None
+    return extract_from_html(final_url, html)
+
+
+def make_extract_pool(workers: int):
+    """ProcessPoolExecutor for trafilatura, or a null context (extract in the event loop) when workers <= 0."""
+    if workers <= 0:
+        return nullcontext(None)
+    return ProcessPoolExecutor(max_workers=workers)
+
+
 # =========================
 # Django command
 # =========================
@@ -143,33 +593,312 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("--limit", type=int, default=50)
-        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--concurrency", type=int, default=10, help="Concurrent downloads")
+        parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="Concurrent downloads per host")
+        parser.add_argument(
+            "--host-rate",
+            type=float,
+            default=DEFAULT_HOST_RATE,
+            help="Requests/second per host (0 = no rate limit)",
+        )
+        parser.add_argument("--host-burst", type=int, default=DEFAULT_HOST_BURST)
         parser.add_argument("--retries", type=int, default=2)
         parser.add_argument("--timeout", type=int, default=40)
+        parser.add_argument(
+            "--max-bytes",
+            type=int,
+            default=ARTICLE_MAX_BYTES,
+            help="Abort article bodies larger than this (0 = no cap)",
+        )
+        parser.add_argument(
+            "--retries-only",
+            action="store_true",
+            help="Only pick failed items whose next retry is due",
+        )
+        parser.add_argument(
+            "--cache-dir",
+            default=None,
+            help="Keep raw HTML here (default: settings.HTML_CACHE_DIR; empty = no cache)",
+        )
+        parser.add_argument(
+            "--from-cache",
+            action="store_true",
+            help="No network: re-extract the newest --limit cached pages (0 = all)",
+        )
+        parser.add_argument(
+            "--follow",
+            action="store_true",
+            help="Daemon mode: keep picking new items as download slots free up (stop with SIGINT/SIGTERM)",
+        )
+        parser.add_argument("--poll-interval", type=float, default=FOLLOW_POLL_INTERVAL, help="--follow: idle DB poll (s)")
+        parser.add_argument("--heartbeat", type=float, default=FOLLOW_HEARTBEAT, help="--follow: status line period (s)")
+        parser.add_argument(
+            "--extract-workers",
+            type=int,
+            default=DEFAULT_EXTRACT_WORKERS,
+            help="trafilatura processes (0 = extract in the event loop)",
+        )
 
     def handle(self, *args, **options):
+        if options["from_cache"]:
+            self.run_from_cache(
+                limit=options["limit"],
+                extract_workers=options["extract_workers"],
+                cache_dir=options["cache_dir"],
+            )
+            return
         asyncio.run(self.run(**options))
 
+    def run_from_cache(
+        self,
+        limit: int,
+        extract_workers: int = DEFAULT_EXTRACT_WORKERS,
+        cache_dir: str | None = None,
+    ) -> int:
+        """Re-run extraction over cached HTML (no network); returns how many articles were reprocessed."""
+        cache_dir = settings.HTML_CACHE_DIR if cache_dir is None else cache_dir
+        if not cache_dir:
+            raise CommandError("--from-cache needs HTML_CACHE_DIR (or --cache-dir)")
+
+        qs = Article.objects.exclude(html_sha256="").order_by("-id")
+        if limit:
+            qs = qs[:limit]
+        rows = list(qs.values_list("id", "html_sha256", "final_url"))
+        if not rows:
+            self.stdout.write(self.style.SUCCESS("No cached pages to re-extract"))
+            return 0
+
+        self.stdout.write(f"Re-extracting {len(rows)} cached pages (extract_workers={extract_workers})")
+        started = time.monotonic()
+        ids, digests, urls = zip(*rows)
+        done = ok = missing = 0
+        batch: list[tuple[int, ExtractResult]] = []
+
+        with make_extract_pool(extract_workers) as pool:
+            args = (extract_cached, [cache_dir] * len(rows), digests, urls)
+            results = pool.map(*args, chunksize=16) if pool is not None else map(*args)
+            for article_id, res in zip(ids, results):
+                if res is None:
+                    missing += 1
+                    continue
+                batch.append((article_id, res))
+                ok += res.ok
+                done += 1
+                if len(batch) >= 200:
+                    save_reextracted(batch)
+                    batch = []
+        save_reextracted(batch)
+
+        wall = time.monotonic() - started
+        self.stdout.write(
+            f"Re-extracted: {done} ({ok} ok, {done - ok} failed, {missing} missing from cache) "
+            f"in {wall:.1f}s ({done / wall if wall else 0:.0f} pages/s)"
+        )
+        self.stdout.write(self.style.SUCCESS("Done"))
+        return done
+
     async def run(
         self,
         limit: int,
         concurrency: int,
         retries: int,
         timeout: int,
+        max_bytes: int = ARTICLE_MAX_BYTES,
+        extract_workers: int = DEFAULT_EXTRACT_WORKERS,
+        per_host: int = DEFAULT_PER_HOST,
+        host_rate: float = DEFAULT_HOST_RATE,
+        host_burst: int = DEFAULT_HOST_BURST,
+        retries_only: bool = False,
+        cache_dir: str | None = None,
+        follow: bool = False,
+        poll_interval: float = FOLLOW_POLL_INTERVAL,
+        heartbeat: float = FOLLOW_HEARTBEAT,
+        verbosity: int = 1,
         **_,
-    ):
-        items = await pick_items(limit)
-        if not items:
-            self.stdout.write(self.style.SUCCESS("No items to extract"))
-            return
-
-        self.stdout.write(
-            f"Extracting {len(items)} items "
-            f"(concurrency={concurrency}, retries={retries})"
+    ) -> list[int]:
+        """
+        Batch mode: one pick of `limit` items; returns ids of the items that got an Article row.
+        follow=True: keep refilling the work queue from the DB until SIGINT/SIGTERM; returns [].
+        """
+        cache_dir = settings.HTML_CACHE_DIR if cache_dir is None else cache_dir
+        stats = RunStats()
+        done_ids: list[int] = []
+        # picked but not written yet: the producer must not pick them again
+        in_flight: set[int] = set()
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        if follow:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, stop.set)
+
+        limiter = PoliteLimiter(concurrency, per_host, rate=host_rate, burst=host_burst)
+        # more consumers than download slots: a consumer stuck behind a cooling-down
+        # host doesn't leave a slot idle for other hosts
+        n_downloaders = max(1, concurrency) * DOWNLOADERS_PER_SLOT
+        n_extractors = max(1, extract_workers)
+        # canonical-URL groups waiting for a downloader
+        work: asyncio.Queue[list[RawItem] | None] = asyncio.Queue(maxsize=max(1, concurrency) * 2)
+        # downloaded pages waiting for an extractor; a full queue holds downloads back
+        pages: asyncio.Queue[Downloaded | None] = asyncio.Queue(maxsize=n_extractors * 2)
+        slot_freed = asyncio.Event()
+        writer = ArticleWriter(
+            batch_size=WRITE_BATCH,
+            max_delay=WRITE_MAX_DELAY,
+            on_written=in_flight.difference_update,
+            # stop picking work; close() re-raises, so a --follow worker exits and gets restarted
+            on_error=lambda e: stop.set(),
+            log=self.stderr.write,
         )
+        quiet = follow and verbosity < 2
+
+        async def put_result(item: RawItem, res: ExtractResult):
+            # blocks when the writer is behind: backpressure up to the downloads
+            await writer.put(item, res)
+            stats.done += 1
+            if not follow:
+                done_ids.append(item.id)
+
+        async def enqueue(items: list[RawItem]):
+            in_flight.update(it.id for it in items)
+            groups = group_by_canonical(items)
+            known = await load_known_articles([k for k in (item_key(g[0]) for g in groups) if k])
+            fetch = 0
+            for group in groups:
+                res = known.get(item_key(group[0]))
+                if res is None:
+                    fetch += 1
+                    await work.put(group)
+                    continue
+                # already extracted under another RawItem (earlier run): copy, no download
+                for it in group:
+                    await put_result(it, res)
+                stats.reused += len(group)
+            stats.picked += len(items)
+            stats.downloads_saved += len(items) - fetch
+            return fetch
+
+        async def produce():
+            if not follow:
+                items = await pick_items(limit, retries_only)
+                if items:
+                    fetch = await enqueue(items)
+                    self.stdout.write(
+                        f"Extracting {len(items)} items as {fetch} downloads "
+                        f"({stats.downloads_saved} saved by canonical URL, {stats.reused} copied from earlier articles) "
+                        f"(concurrency={concurrency}, per_host={per_host}, host_rate={host_rate}/s, "
+                        f"retries={retries}, extract_workers={extract_workers})"
+                    )
+                return
+
+            self.stdout.write(
+                f"Following: refill from DB every {poll_interval:g}s when idle "
+                f"(concurrency={concurrency}, per_host={per_host}, host_rate={host_rate}/s, "
+                f"retries={retries}, extract_workers={extract_workers})"
+            )
+            while not stop.is_set():
+                free = work.maxsize - work.qsize()
+                items = []
+                if free > 0:
+                    items = await pick_items(min(free, limit or free), retries_only, exclude_ids=in_flight)
+                    if items:
+                        await enqueue(items)
+
+                slot_freed.clear()
+                # busy: refill as soon as a downloader takes a group; idle: poll the DB again later
+                waiters = [asyncio.ensure_future(stop.wait())]
+                if items or free <= 0:
+                    waiters.append(asyncio.ensure_future(slot_freed.wait()))
+                await asyncio.wait(waiters, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                for w in waiters:
+                    w.cancel()
+
+        async def deliver(d: Downloaded):
+            stats.download_ms += d.download_ms
+            stats.downloads += 1
+            await pages.put(d)
+
+        async def download():
+            while True:
+                group = await work.get()
+                slot_freed.set()
+                if group is None:
+                    return
+                await download_one(session, limiter, group[0], retries, max_bytes, deliver, group[1:])
+
+        async def extract(pool):
+            while True:
+                d = await pages.get()
+                if d is None:
+                    return
+
+                took = 0
+                if d.error:
+                    result = ExtractResult(
+                        ok=False,
+                        final_url=d.final_url,
+                        error=d.error,
+                        error_class=d.error_class,
+                        retry_after=d.retry_after,
+                    )
+                else:
+                    try:
+                        if pool is None:
+                            result, took = extract_timed(d.final_url, d.html, cache_dir)
+                        else:
+                            result, took = await loop.run_in_executor(
+                                pool, extract_timed, d.final_url, d.html, cache_dir
+                            )
+                    except Exception as e:
+                        # e.g. a crashed pool worker: worth another try later
+                        result = ExtractResult(
+                            ok=False,
+                            final_url=d.final_url,
+                            error=f"extract: {e}",
+                            error_class=ExtractErrorClass.TRANSIENT,
+                        )
+                    stats.extract_ms += took
+                    stats.extracted += 1
+
+                await put_result(d.item, result)
+                for it in d.followers:
+                    await put_result(it, replace(result, stored_size=0))
+
+                if quiet:
+                    continue
+                status = "OK" if result.ok else "FAIL"
+                title = (result.title or d.item.title or "")[:80]
+                timing = f"{d.download_ms}+{took}ms"
+
+                if result.ok:
+                    fanout = f" (+{len(d.followers)} same URL)" if d.followers else ""
+                    self.stdout.write(f"[{status}] {timing} item={d.item.id}{fanout} {title}")
+                else:
+                    err = (result.error or "unknown")[:140]
+                    self.stdout.write(
+                        f"[{status}] {timing} item={d.item.id} {title} | {result.error_class or 'transient'}: {err}"
+                    )
+
+        async def report():
+            last_written, last_ts = 0, time.monotonic()
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    pass
+                now = time.monotonic()
+                rate = (writer.written - last_written) / max(1e-6, now - last_ts)
+                last_written, last_ts = writer.written, now
+                self.stdout.write(
+                    f"[heartbeat] {rate:.1f} items/s, written={writer.written}, "
+                    f"work_queue={work.qsize()}/{work.maxsize}, extract_queue={pages.qsize()}/{pages.maxsize}, "
+                    f"in_flight={len(in_flight)}, throttled_hosts={limiter.cooling_hosts()}"
+                )
+                # long-lived process: drop connections MySQL may have timed out
+                await recycle_connections()
 
         client_timeout = aiohttp.ClientTimeout(total=timeout)
-        connector = aiohttp.TCPConnector(limit=concurrency * 2)
+        connector = aiohttp.TCPConnector(limit=concurrency * 2, limit_per_host=max(1, per_host))
 
         headers = {
             "User-Agent": UA,
@@ -179,30 +908,51 @@ class Command(BaseCommand):
             "Connection": "keep-alive",
         }
 
-        sem = asyncio.Semaphore(concurrency)
-
-        async with aiohttp.ClientSession(
-            timeout=client_timeout,
-            connector=connector,
-            headers=headers,
-        ) as session:
-
-            async def bounded(item: RawItem):
-                async with sem:
-                    start = time.monotonic()
-                    result = await process_one(session, item, retries)
-                    await save_article(item.id, result)
-                    elapsed = int((time.monotonic() - start) * 1000)
-
-                    status = "OK" if result.ok else "FAIL"
-                    title = (result.title or item.title or "")[:80]
-
-                    if result.ok:
-                        self.stdout.write(f"[{status}] {elapsed}ms item={item.id} {title}")
-                    else:
-                        err = (result.error or "unknown")[:140]
-                        self.stdout.write(f"[{status}] {elapsed}ms item={item.id} {title} | {err}")
-
-            await asyncio.gather(*(bounded(it) for it in items))
+        started = time.monotonic()
+        with make_extract_pool(extract_workers) as pool:
+            async with aiohttp.ClientSession(
+                timeout=client_timeout,
+                connector=connector,
+                headers=headers,
+            ) as session:
+                writer.start()
+                downloaders = [asyncio.create_task(download()) for _ in range(n_downloaders)]
+                extractors = [asyncio.create_task(extract(pool)) for _ in range(n_extractors)]
+                reporter = asyncio.create_task(report()) if follow and heartbeat > 0 else None
+                try:
+                    await produce()
+                    # drain: every stage finishes its queue before the next one is told to stop
+                    for _ in downloaders:
+                        await work.put(None)
+                    await asyncio.gather(*downloaders)
+                    for _ in extractors:
+                        await pages.put(None)
+                    await asyncio.gather(*extractors)
+                    await writer.close()
+                finally:
+                    stop.set()
+                    for t in downloaders + extractors:
+                        t.cancel()
+                    writer.cancel()
+                    if reporter is not None:
+                        await reporter
+
+        if not stats.picked:
+            self.stdout.write(self.style.SUCCESS("No items to extract"))
+            return []
 
+        wall = time.monotonic() - started
+        self.stdout.write(
+            f"Download: {stats.download_ms / 1000:.1f}s over {stats.downloads} URLs "
+            f"({stats.download_ms // max(1, stats.downloads)}ms avg, {stats.downloads_saved} downloads saved); "
+            f"extract: {stats.extract_ms / 1000:.1f}s over {stats.extracted} pages "
+            f"({stats.extract_ms // max(1, stats.extracted)}ms avg, workers={extract_workers}); "
+            f"wall {wall:.1f}s"
+        )
+        self.stdout.write(
+            f"DB: {writer.written} articles in {writer.flushes} batches ({writer.write_ms / 1000:.1f}s)"
+        )
+        if limiter.throttled:
+            self.stdout.write(f"Throttled: {limiter.throttled} responses from {limiter.throttled_hosts()} hosts")
         self.stdout.write(self.style.SUCCESS("Done"))
+        return done_ids
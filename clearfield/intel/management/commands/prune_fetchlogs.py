@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from intel.models import FetchLog, FetchLogHourly
+
+
+def delete_in_chunks(qs, chunk: int, pause: float) -> int:
+    """Delete rows of qs by primary key, `chunk` at a time (short transactions, no table-wide lock)."""
+    deleted = 0
+    while True:
+        ids = list(qs.order_by("pk").values_list("pk", flat=True)[:chunk])
+        if not ids:
+            return deleted
+        n, _ = qs.model.objects.filter(pk__in=ids).delete()
+        deleted += n
+        if pause:
+            time.sleep(pause)
+
+
+class Command(BaseCommand):
+    help = "Prune raw FetchLog rows (and optionally old hourly rollups) in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=14, help="Keep raw FetchLog rows newer than this")
+        parser.add_argument(
+            "--rollup-days",
+            type=int,
+            default=0,
+            help="Also prune FetchLogHourly older than this (0 = keep rollups forever)",
+        )
+        parser.add_argument("--chunk", type=int, default=5000)
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between chunks")
+
+    def handle(self, *args, **opts):
+        days = int(opts["days"])
+        rollup_days = int(opts["rollup_days"])
+        chunk = max(1, int(opts["chunk"]))
+        pause = float(opts["pause"])
+
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted = delete_in_chunks(FetchLog.objects.filter(fetched_at__lt=cutoff), chunk, pause)
+        self.stdout.write(f"FetchLog rows deleted: {deleted} (older than {cutoff.isoformat()})")
+
+        if rollup_days > 0:
+            rollup_cutoff = timezone.now() - timedelta(days=rollup_days)
+            deleted = delete_in_chunks(FetchLogHourly.objects.filter(hour__lt=rollup_cutoff), chunk, pause)
+            self.stdout.write(f"FetchLogHourly rows deleted: {deleted} (older than {rollup_cutoff.isoformat()})")
+
+        self.stdout.write(self.style.SUCCESS("Done"))
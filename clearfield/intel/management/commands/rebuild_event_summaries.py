@@ -6,67 +6,11 @@ from django.db.models import Q
 from django.utils import timezone
 
 from intel.models import Event, EventItem, RawItem, Article
-
-
-# =========================
-# Noise cleanup
-# =========================
-
-NOISE_PHRASES = [
-    "One of your browser extensions seems to be blocking the video player",
-    "To watch this content, you may need to disable it on this site",
-    "Follow our liveblog",
-    "for all the latest developments.",
-    "for all the latest updates.",
-]
-
-NOISE_RE = [
-    r"\bLive:\s*",                      # "Live:"
-    r"\bFollow (our )?liveblog.*$",      # tail like "Follow our liveblog ..."
-    r"\bfrom loading(?:\s*\.)*\b",       # "from loading." / "from loading. ."
-    r"\bblocking the video player from loading\b",
-    r"\bOne of your browser extensions seems to be blocking the video player\b",
-    r"\bTo watch this content, you may need to disable it on this site\b",
-]
-
-
-WORD_RE = re.compile(r"[A-Za-z0-9]+", re.UNICODE)
-
-
-def sanitize(text: str) -> str:
-    t = (text or "").strip()
-
-    for p in NOISE_PHRASES:
-        t = t.replace(p, " ")
-
-    for rx in NOISE_RE:
-        t = re.sub(rx, " ", t, flags=re.IGNORECASE | re.MULTILINE)
-
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
-
-
-def token_count(text: str) -> int:
-    return len(WORD_RE.findall((text or "").lower()))
-
-
-def is_placeholder(clean_text: str, min_len: int = 140, min_tokens: int = 30) -> bool:
-    """Heuristic: detect empty/placeholder/blocked extracts."""
-    if not clean_text:
-        return True
-    if re.search(r"\bfrom loading\b", clean_text, flags=re.IGNORECASE):
-        return True
-    if re.search(r"\bblocking the video player\b", clean_text, flags=re.IGNORECASE):
-        return True
-    if len(clean_text) < min_len:
-        return True
-    if token_count(clean_text) < min_tokens:
-        return True
-    return False
+from intel.textfeatures import DEFAULT_MIN_CLEAN_LEN, DEFAULT_MIN_TOKENS, is_placeholder, summary_sanitize
 
 
 def pick_summary(text: str, title: str = "") -> str:
-    t = sanitize(text)
+    t = summary_sanitize(text)
 
     tt = (title or "").strip()
     if tt and t.lower().startswith(tt.lower()):
@@ -86,8 +30,8 @@ class Command(BaseCommand):
             action="store_true",
             help="If set, updates Event.updated_at as well. Default: keep updated_at intact.",
         )
-        parser.add_argument("--min-clean-len", type=int, default=140)
-        parser.add_argument("--min-tokens", type=int, default=30)
+        parser.add_argument("--min-clean-len", type=int, default=DEFAULT_MIN_CLEAN_LEN)
+        parser.add_argument("--min-tokens", type=int, default=DEFAULT_MIN_TOKENS)
 
     def handle(self, *args, **opts):
         hours = int(opts["hours"])
@@ -103,9 +47,26 @@ class Command(BaseCommand):
         if verbosity >= 2:
             self.stdout.write(f"Found events in window: {len(events)} (since={since.isoformat()})")
 
+        updated = self.rebuild(
+            events,
+            touch_updated_at=touch_updated_at,
+            min_clean_len=min_clean_len,
+            min_tokens=min_tokens,
+            verbosity=verbosity,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated summaries: {updated}"))
+
+    def rebuild(
+        self,
+        events: list,
+        touch_updated_at: bool = False,
+        min_clean_len: int = DEFAULT_MIN_CLEAN_LEN,
+        min_tokens: int = DEFAULT_MIN_TOKENS,
+        verbosity: int = 1,
+    ) -> int:
+        """Recompute summaries for the given events; returns how many were updated."""
         if not events:
-            self.stdout.write(self.style.SUCCESS("Updated summaries: 0"))
-            return
+            return 0
 
         event_ids = [e.id for e in events]
 
@@ -114,8 +75,7 @@ class Command(BaseCommand):
             EventItem.objects.filter(event_id__in=event_ids).only("event_id", "item_id")
         )
         if not ev_items:
-            self.stdout.write(self.style.SUCCESS("Updated summaries: 0"))
-            return
+            return 0
 
         item_ids = list({ei.item_id for ei in ev_items})
 
@@ -123,53 +83,73 @@ class Command(BaseCommand):
         raw_by_id = {
             r.id: r for r in RawItem.objects.filter(id__in=item_ids).only("id", "title", "summary", "url")
         }
+        # Article.clean_len/is_placeholder are precomputed with the default thresholds:
+        # with those, article text is only loaded for the winning candidates
+        use_features = (min_clean_len, min_tokens) == (DEFAULT_MIN_CLEAN_LEN, DEFAULT_MIN_TOKENS)
         art_by_item = {
-            a.item_id: a for a in Article.objects.filter(item_id__in=item_ids).only("item_id", "title", "text")
+            a.item_id: a
+            for a in Article.objects.filter(item_id__in=item_ids).only(
+                "item_id", "title", "clean_len", "is_placeholder", "token_count"
+            )
         }
+        text_ids = [a.item_id for a in art_by_item.values() if not use_features or a.token_count is None]
+        text_by_item = dict(Article.objects.filter(item_id__in=text_ids).values_list("item_id", "text"))
 
         # Group EventItem by event
         items_by_event = {}
         for ei in ev_items:
             items_by_event.setdefault(ei.event_id, []).append(ei.item_id)
 
-        updated = 0
-        skipped_no_good_text = 0
-        skipped_unchanged = 0
-
+        # pass 1: pick the best candidate per event (by clean length)
+        best_by_event = {}
         for ev in events:
-            ids = items_by_event.get(ev.id) or []
-            if not ids:
-                skipped_no_good_text += 1
-                continue
+            best_len = 0
+            best = None  # (src, item_id, text or None = load article text later)
 
-            best_text = ""
-            best_clean = ""
-            best_src = None
-
-            for item_id in ids:
+            for item_id in items_by_event.get(ev.id) or []:
                 raw = raw_by_id.get(item_id)
                 art = art_by_item.get(item_id)
 
                 # Candidate chain (ordered):
                 candidates = []
-                if art and (art.text or "").strip():
-                    candidates.append(("article", art.text))
+                if art and item_id not in text_by_item:
+                    if not art.is_placeholder and art.clean_len > best_len:
+                        best_len = art.clean_len
+                        best = ("article", item_id, None)
+                elif art and (text_by_item[item_id] or "").strip():
+                    candidates.append(("article", text_by_item[item_id]))
                 if raw and (raw.summary or "").strip():
                     candidates.append(("raw_summary", raw.summary))
                 if raw and (raw.title or "").strip():
                     candidates.append(("raw_title", raw.title))
 
                 for src, txt in candidates:
-                    clean = sanitize(txt)
+                    clean = summary_sanitize(txt)
 
                     if is_placeholder(clean, min_len=min_clean_len, min_tokens=min_tokens):
                         continue
 
                     # choose most informative clean text
-                    if len(clean) > len(best_clean):
-                        best_clean = clean
-                        best_text = txt
-                        best_src = (src, item_id)
+                    if len(clean) > best_len:
+                        best_len = len(clean)
+                        best = (src, item_id, txt)
+
+            best_by_event[ev.id] = best
+
+        winners = [b[1] for b in best_by_event.values() if b is not None and b[2] is None]
+        text_by_item.update(Article.objects.filter(item_id__in=winners).values_list("item_id", "text"))
+
+        updated = 0
+        skipped_no_good_text = 0
+        skipped_unchanged = 0
+
+        for ev in events:
+            best = best_by_event[ev.id]
+            best_text = ""
+            best_src = None
+            if best is not None:
+                best_src = best[:2]
+                best_text = best[2] if best[2] is not None else text_by_item.get(best[1], "")
 
             if not best_text:
                 skipped_no_good_text += 1
@@ -206,4 +186,4 @@ class Command(BaseCommand):
             self.stdout.write(f"Skipped (no good text): {skipped_no_good_text}")
             self.stdout.write(f"Skipped (unchanged): {skipped_unchanged}")
 
-        self.stdout.write(self.style.SUCCESS(f"Updated summaries: {updated}"))
+        return updated
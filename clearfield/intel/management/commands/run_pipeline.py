@@ -0,0 +1,165 @@
+import os
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from intel.fetching import ARTICLE_MAX_BYTES, FEED_MAX_BYTES
+from intel.management.commands.cluster_events import Command as ClusterCommand, QueryCounter
+from intel.management.commands.daily_brief import Command as BriefCommand
+from intel.management.commands.extract_articles import (
+    DEFAULT_EXTRACT_WORKERS,
+    DEFAULT_HOST_RATE,
+    DEFAULT_PER_HOST as DEFAULT_ARTICLE_PER_HOST,
+    Command as ExtractCommand,
+)
+from intel.management.commands.ingest_feeds import DEFAULT_PARSE_WORKERS, Command as IngestCommand
+from intel.management.commands.rebuild_event_summaries import Command as RebuildCommand
+from intel.models import Event, PipelineRun
+from intel.textfeatures import DEFAULT_MIN_CLEAN_LEN, DEFAULT_MIN_TOKENS
+
+
+def write_atomic(path: str, render) -> int:
+    """render(out) into path.tmp, then rename: readers never see a half-written brief."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as out:
+        n = render(out)
+    os.replace(tmp, path)
+    return n
+
+
+class Command(BaseCommand):
+    help = "Run ingest -> extract -> cluster -> summarize -> brief in one process (summaries only for touched events)"
+
+    def add_arguments(self, parser):
+        # ingest
+        parser.add_argument("--feeds-limit", type=int, default=50, help="Max sources per run")
+        parser.add_argument("--concurrency", type=int, default=20, help="Max feeds fetched at once")
+        parser.add_argument("--per-host", type=int, default=2)
+        parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS)
+        parser.add_argument("--fast-parse", action="store_true")
+        parser.add_argument("--feed-max-bytes", type=int, default=FEED_MAX_BYTES)
+        # extract
+        parser.add_argument("--extract-limit", type=int, default=200)
+        parser.add_argument("--extract-concurrency", type=int, default=10)
+        parser.add_argument("--retries", type=int, default=2)
+        parser.add_argument("--timeout", type=int, default=40)
+        parser.add_argument("--article-max-bytes", type=int, default=ARTICLE_MAX_BYTES)
+        parser.add_argument("--extract-workers", type=int, default=DEFAULT_EXTRACT_WORKERS)
+        parser.add_argument("--article-per-host", type=int, default=DEFAULT_ARTICLE_PER_HOST)
+        parser.add_argument("--host-rate", type=float, default=DEFAULT_HOST_RATE, help="Article requests/second per host")
+        # cluster / summarize
+        parser.add_argument("--since-hours", type=int, default=24)
+        parser.add_argument("--cluster-limit", type=int, default=2000)
+        parser.add_argument("--max-dist", type=int, default=3)
+        parser.add_argument("--min-clean-len", type=int, default=DEFAULT_MIN_CLEAN_LEN)
+        parser.add_argument("--min-tokens", type=int, default=DEFAULT_MIN_TOKENS)
+        # brief
+        parser.add_argument("--brief-hours", type=int, default=72)
+        parser.add_argument("--min-evidence", type=int, default=1)
+        parser.add_argument("--brief-out", default="", help="Write the brief here (atomically); empty = skip stage")
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Cluster every unlinked item in the window, ignoring the cluster_events watermark",
+        )
+
+    def handle(self, *args, **opts):
+        run = PipelineRun.objects.create()
+        self.stages = run.stages
+        started = time.monotonic()
+        try:
+            self.pipeline(opts)
+            run.ok = True
+        except Exception as e:
+            run.error = f"{type(e).__name__}: {e}"
+            raise CommandError(f"Pipeline failed: {run.error}") from e
+        finally:
+            run.finished_at = timezone.now()
+            run.save(update_fields=["finished_at", "ok", "stages", "error"])
+            total_ms = int((time.monotonic() - started) * 1000)
+            summary = ", ".join(f"{name}={st['ms']}ms/{st['queries']}q" for name, st in self.stages.items())
+            self.stdout.write(f"Pipeline run #{run.id}: {summary} (total {total_ms}ms)")
+
+    def stage(self, name: str, fn, *args, **kwargs):
+        """Run one stage, record its wall time, SQL statements and output size in PipelineRun.stages."""
+        started = time.monotonic()
+        queries = QueryCounter()
+        self.stdout.write(f"--- {name} ---")
+        try:
+            with connection.execute_wrapper(queries):
+                result = fn(*args, **kwargs)
+        finally:
+            self.stages[name] = {"ms": int((time.monotonic() - started) * 1000), "queries": queries.count}
+        self.stages[name]["out"] = len(result) if isinstance(result, (list, set)) else result
+        return result
+
+    def pipeline(self, opts):
+        full = opts["full"]
+        io = {"stdout": self.stdout, "stderr": self.stderr}
+
+        # async stages go through async_to_sync: their thread-sensitive ORM calls
+        # run on this thread and reuse the same DB connection as the sync stages
+        self.stage(
+            "ingest",
+            async_to_sync(IngestCommand(**io).run),
+            limit=opts["feeds_limit"],
+            concurrency=opts["concurrency"],
+            per_host=opts["per_host"],
+            parse_workers=opts["parse_workers"],
+            fast_parse=opts["fast_parse"],
+            max_bytes=opts["feed_max_bytes"],
+        )
+
+        # extract always reads the shared priority queue + due retries: items ingested
+        # by run_scheduler or left over from earlier runs are not lost behind this run's delta
+        self.stage(
+            "extract",
+            async_to_sync(ExtractCommand(**io).run),
+            limit=opts["extract_limit"],
+            concurrency=opts["extract_concurrency"],
+            retries=opts["retries"],
+            timeout=opts["timeout"],
+            max_bytes=opts["article_max_bytes"],
+            extract_workers=opts["extract_workers"],
+            per_host=opts["article_per_host"],
+            host_rate=opts["host_rate"],
+        )
+
+        def cluster():
+            # the watermark covers this run's items, items extracted now that were ingested
+            # earlier (or by run_scheduler), and near-duplicates whose representative got linked
+            events, linked, touched = ClusterCommand(**io).cluster(
+                since_hours=opts["since_hours"],
+                limit=opts["cluster_limit"],
+                max_dist=opts["max_dist"],
+                incremental=not full,
+            )
+            self.stdout.write(f"Events upserted: {events}, items linked: {linked}")
+            return touched
+
+        touched = self.stage("cluster", cluster)
+
+        def summarize():
+            events = list(Event.objects.filter(id__in=touched))
+            updated = RebuildCommand(**io).rebuild(
+                events,
+                min_clean_len=opts["min_clean_len"],
+                min_tokens=opts["min_tokens"],
+            )
+            self.stdout.write(f"Updated summaries: {updated}")
+            return updated
+
+        self.stage("summarize", summarize)
+
+        if opts["brief_out"]:
+            brief = BriefCommand(**io)
+            self.stage(
+                "brief",
+                write_atomic,
+                opts["brief_out"],
+                lambda out: brief.render(out, hours=opts["brief_hours"], min_evidence=opts["min_evidence"]),
+            )
@@ -0,0 +1,348 @@
+import asyncio
+import heapq
+import signal
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from intel.management.commands.ingest_feeds import (
+    DEFAULT_PARSE_WORKERS,
+    Command as IngestCommand,
+    FetchLogBuffer,
+    HostLimiter,
+    make_parse_pool,
+)
+from intel.dbutil import recycle_connections
+from intel.fetching import FEED_MAX_BYTES
+from intel.models import Cadence, FetchLog, FetchOutcome, Source
+
+
+# Base polling interval per cadence (middle of the ranges in Cadence labels)
+CADENCE_INTERVALS = {
+    Cadence.HOT: timedelta(minutes=10),
+    Cadence.MEDIUM: timedelta(hours=2),
+    Cadence.COLD: timedelta(hours=12),
+}
+
+# Adaptive polling stays inside these (the ranges in Cadence labels)
+CADENCE_BOUNDS = {
+    Cadence.HOT: (timedelta(minutes=5), timedelta(minutes=15)),
+    Cadence.MEDIUM: (timedelta(hours=1), timedelta(hours=3)),
+    Cadence.COLD: (timedelta(hours=6), timedelta(hours=24)),
+}
+
+# History used by the adaptive policy
+ADAPT_WINDOW = timedelta(days=3)
+ADAPT_MAX_SAMPLES = 50
+ADAPT_MIN_SAMPLES = 5
+# aim for roughly this many new items per successful poll
+TARGET_NEW_PER_POLL = 2.0
+# failing sources back off exponentially, up to this
+BACKOFF_MAX = timedelta(hours=24)
+
+
+def cadence_interval(cadence: str) -> timedelta:
+    return CADENCE_INTERVALS.get(cadence, CADENCE_INTERVALS[Cadence.MEDIUM])
+
+
+@dataclass
+class SourceStats:
+    fetches: int = 0
+    new_items: int = 0
+    unchanged: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    span_hours: float = 0.0
+
+    @property
+    def unchanged_ratio(self) -> float:
+        ok = self.fetches - self.errors
+        return self.unchanged / ok if ok else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.fetches if self.fetches else 0.0
+
+
+def adaptive_interval(cadence: str, stats: SourceStats | None, consecutive_errors: int = 0) -> timedelta:
+    """
+    Next polling interval for a source:
+    - failing: exponential backoff from the cadence interval (may exceed cadence bounds);
+    - little history: plain cadence interval;
+    - otherwise: interval that yields ~TARGET_NEW_PER_POLL new items, clamped to cadence bounds.
+    """
+    base = cadence_interval(cadence)
+    lo, hi = CADENCE_BOUNDS.get(cadence, CADENCE_BOUNDS[Cadence.MEDIUM])
+
+    if consecutive_errors:
+        return min(base * 2 ** min(consecutive_errors, 16), max(BACKOFF_MAX, hi))
+
+    if stats is None or stats.fetches < ADAPT_MIN_SAMPLES:
+        return base
+
+    if stats.new_items == 0:
+        return hi
+
+    span = max(stats.span_hours, base.total_seconds() / 3600)
+    new_per_hour = stats.new_items / span
+    target = timedelta(hours=TARGET_NEW_PER_POLL / new_per_hour)
+
+    # mostly 304/unchanged: lean towards the slow end
+    if stats.unchanged_ratio >= 0.8:
+        target *= 1.5
+    # flaky source: never poll it faster than its cadence
+    if stats.error_rate >= 0.5:
+        target = max(target, base)
+
+    return max(lo, min(hi, target))
+
+
+@sync_to_async
+def load_source_stats(source_ids: list[int]) -> dict[int, SourceStats]:
+    """Per-source polling stats from recent FetchLog rows (newest first, capped per source)."""
+    since = timezone.now() - ADAPT_WINDOW
+    # the per-source cap is applied in SQL (ROW_NUMBER over the source's fetches),
+    # so a source polled every minute does not ship 3 days of rows to Python
+    rows = (
+        FetchLog.objects
+        .filter(source_id__in=source_ids, fetched_at__gte=since)
+        .annotate(rn=Window(RowNumber(), partition_by=F("source_id"), order_by=F("fetched_at").desc()))
+        .filter(rn__lte=ADAPT_MAX_SAMPLES)
+        .order_by("source_id", "-fetched_at")
+        .values_list("source_id", "fetched_at", "outcome", "error", "items_new")
+    )
+
+    stats: dict[int, SourceStats] = defaultdict(SourceStats)
+    newest = {}
+    streak_open = {}
+    for source_id, fetched_at, outcome, error, items_new in rows.iterator():
+        st = stats[source_id]
+        st.fetches += 1
+
+        # rows written before FetchLog.outcome existed only have `error`
+        failed = outcome in (FetchOutcome.ERROR, FetchOutcome.ABORTED) or (not outcome and bool(error))
+        if failed:
+            st.errors += 1
+        elif outcome in (FetchOutcome.NOT_MODIFIED, FetchOutcome.UNCHANGED):
+            st.unchanged += 1
+        st.new_items += items_new or 0
+
+        # trailing run of errors, counted from the newest fetch
+        if streak_open.setdefault(source_id, True):
+            if failed:
+                st.consecutive_errors += 1
+            else:
+                streak_open[source_id] = False
+
+        newest.setdefault(source_id, fetched_at)
+        st.span_hours = (newest[source_id] - fetched_at).total_seconds() / 3600
+
+    return dict(stats)
+
+
+@sync_to_async
+def load_enabled_sources():
+    return list(Source.objects.filter(is_enabled=True))
+
+
+@sync_to_async
+def load_sources(ids: list[int]):
+    # fresh rows: etag/last_modified were updated by the previous fetch
+    return list(Source.objects.filter(id__in=ids, is_enabled=True))
+
+
+class Command(BaseCommand):
+    help = "Long-running feed scheduler: fetch each source when its cadence makes it due"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=20, help="Max feeds fetched at once")
+        parser.add_argument("--per-host", type=int, default=2, help="Max concurrent fetches per host")
+        parser.add_argument(
+            "--parse-workers",
+            type=int,
+            default=DEFAULT_PARSE_WORKERS,
+            help="Feed parser processes (0 = parse in the event loop)",
+        )
+        parser.add_argument(
+            "--fast-parse",
+            action="store_true",
+            help="Try the streaming RSS/Atom parser first, fall back to feedparser",
+        )
+        parser.add_argument(
+            "--max-bytes",
+            type=int,
+            default=FEED_MAX_BYTES,
+            help="Abort feed bodies larger than this (0 = no cap)",
+        )
+        parser.add_argument(
+            "--no-adaptive",
+            action="store_true",
+            help="Use fixed cadence intervals instead of FetchLog-driven adaptive polling",
+        )
+        parser.add_argument("--reload-every", type=int, default=300, help="Seconds between Source table reloads")
+        parser.add_argument("--max-sleep", type=float, default=5.0, help="Upper bound on idle sleep (seconds)")
+
+    def handle(self, *args, **options):
+        asyncio.run(
+            self.run(
+                concurrency=options["concurrency"],
+                per_host=options["per_host"],
+                parse_workers=options["parse_workers"],
+                fast_parse=options["fast_parse"],
+                adaptive=not options["no_adaptive"],
+                max_bytes=options["max_bytes"],
+                reload_every=options["reload_every"],
+                max_sleep=options["max_sleep"],
+            )
+        )
+
+    async def run(
+        self,
+        concurrency: int,
+        per_host: int,
+        parse_workers: int,
+        fast_parse: bool,
+        reload_every: int,
+        max_sleep: float,
+        adaptive: bool = True,
+        max_bytes: int = FEED_MAX_BYTES,
+    ):
+        with make_parse_pool(parse_workers) as pool:
+            await self.loop(concurrency, per_host, pool, fast_parse, adaptive, reload_every, max_sleep, max_bytes)
+
+    async def loop(
+        self,
+        concurrency: int,
+        per_host: int,
+        parse_pool,
+        fast_parse: bool,
+        adaptive: bool,
+        reload_every: int,
+        max_sleep: float,
+        max_bytes: int,
+    ):
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        limiter = HostLimiter(concurrency, per_host)
+        ingest = IngestCommand(stdout=self.stdout, stderr=self.stderr)
+        ingest.parse_pool = parse_pool
+        ingest.fast_parse = fast_parse
+        ingest.max_bytes = max_bytes
+        ingest.fetch_logs = FetchLogBuffer(max_rows=200, max_age=30.0, log=self.stderr.write)
+
+        # heap of (due_ts, source_id); `scheduled` holds the current due time per source
+        heap: list[tuple[float, int]] = []
+        scheduled: dict[int, float] = {}
+        cadence_by_id: dict[int, str] = {}
+        stats_by_id: dict[int, SourceStats] = {}
+        # live error streaks: seeded from FetchLog, then tracked per fetch
+        error_streak: dict[int, int] = {}
+        in_flight: set[int] = set()
+        tasks: set[asyncio.Task] = set()
+
+        def schedule(source_id: int, due: float):
+            scheduled[source_id] = due
+            heapq.heappush(heap, (due, source_id))
+
+        def interval_for(source_id: int) -> timedelta:
+            cadence = cadence_by_id[source_id]
+            if not adaptive:
+                return cadence_interval(cadence)
+            return adaptive_interval(cadence, stats_by_id.get(source_id), error_streak.get(source_id, 0))
+
+        async def reload_sources():
+            sources = await load_enabled_sources()
+            if adaptive:
+                stats_by_id.clear()
+                stats_by_id.update(await load_source_stats([s.id for s in sources]))
+
+            now_ts = time.time()
+            seen = set()
+            for src in sources:
+                seen.add(src.id)
+                cadence_by_id[src.id] = src.cadence
+                if src.id not in error_streak and src.id in stats_by_id:
+                    error_streak[src.id] = stats_by_id[src.id].consecutive_errors
+                if src.id not in scheduled and src.id not in in_flight:
+                    if src.last_fetch_at is None:
+                        schedule(src.id, now_ts)
+                    else:
+                        schedule(src.id, (src.last_fetch_at + interval_for(src.id)).timestamp())
+            # disabled/deleted sources: their heap entries become stale and are skipped
+            for sid in list(cadence_by_id):
+                if sid not in seen:
+                    scheduled.pop(sid, None)
+                    cadence_by_id.pop(sid, None)
+                    error_streak.pop(sid, None)
+            return len(sources)
+
+        async def fetch(source: Source):
+            try:
+                async with limiter.slot(source.url):
+                    res = await ingest.fetch_one(session, source)
+                error_streak[source.id] = error_streak.get(source.id, 0) + 1 if res.error else 0
+                status = "FAIL" if res.error else "OK"
+                self.stdout.write(
+                    f"[{status}] {res.elapsed_ms}ms source={source.id} new={res.inserted} {source.name[:60]}"
+                )
+            finally:
+                in_flight.discard(source.id)
+                if source.id in cadence_by_id:
+                    schedule(source.id, time.time() + interval_for(source.id).total_seconds())
+
+        total = await reload_sources()
+        self.stdout.write(
+            f"Scheduler started: {total} sources "
+            f"(concurrency={concurrency}, per_host={per_host}, adaptive={adaptive})"
+        )
+        next_reload = time.monotonic() + reload_every
+
+        async with limiter.session() as session:
+            while not stop.is_set():
+                if time.monotonic() >= next_reload:
+                    await recycle_connections()
+                    await reload_sources()
+                    next_reload = time.monotonic() + reload_every
+
+                now_ts = time.time()
+                due_ids = []
+                while heap and heap[0][0] <= now_ts:
+                    due, sid = heapq.heappop(heap)
+                    if scheduled.get(sid) != due:
+                        continue  # stale entry (rescheduled or removed)
+                    del scheduled[sid]
+                    due_ids.append(sid)
+
+                await ingest.fetch_logs.maybe_flush()
+
+                if due_ids:
+                    for src in await load_sources(due_ids):
+                        in_flight.add(src.id)
+                        task = asyncio.create_task(fetch(src))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+
+                sleep_for = max_sleep
+                if heap:
+                    sleep_for = min(sleep_for, max(0.0, heap[0][0] - time.time()))
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=sleep_for)
+                except asyncio.TimeoutError:
+                    pass
+
+            if tasks:
+                self.stdout.write(f"Stopping: waiting for {len(tasks)} in-flight fetches")
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await ingest.fetch_logs.flush()
+
+        self.stdout.write(self.style.SUCCESS("Scheduler stopped"))
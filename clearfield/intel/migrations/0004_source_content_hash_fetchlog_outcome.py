@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0003_event_eventitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fetchlog',
+            name='outcome',
+            field=models.CharField(blank=True, choices=[('ok', 'Fetched and parsed'), ('not_modified', '304 Not Modified'), ('unchanged', 'Body unchanged (parse skipped)'), ('error', 'Error')], max_length=16),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0004_source_content_hash_fetchlog_outcome'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fetchlog',
+            name='items_new',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
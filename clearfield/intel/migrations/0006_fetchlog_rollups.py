@@ -0,0 +1,56 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0005_fetchlog_items_new'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FetchLogHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('fetches', models.IntegerField(default=0)),
+                ('status_2xx', models.IntegerField(default=0)),
+                ('status_3xx', models.IntegerField(default=0)),
+                ('status_4xx', models.IntegerField(default=0)),
+                ('status_5xx', models.IntegerField(default=0)),
+                ('errors', models.IntegerField(default=0)),
+                ('unchanged', models.IntegerField(default=0)),
+                ('items_new', models.IntegerField(default=0)),
+                ('bytes_received', models.BigIntegerField(default=0)),
+                ('elapsed_ms_total', models.BigIntegerField(default=0)),
+                ('max_ms', models.IntegerField(default=0)),
+                ('latency_hist', models.JSONField(default=list)),
+                ('p50_ms', models.IntegerField(blank=True, null=True)),
+                ('p95_ms', models.IntegerField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='fetchlog',
+            index=models.Index(fields=['source', '-fetched_at'], name='fetchlog_source_time'),
+        ),
+        migrations.AddIndex(
+            model_name='fetchlog',
+            index=models.Index(fields=['fetched_at'], name='fetchlog_time'),
+        ),
+        migrations.AddField(
+            model_name='fetchloghourly',
+            name='source',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fetch_rollups', to='intel.source'),
+        ),
+        migrations.AddIndex(
+            model_name='fetchloghourly',
+            index=models.Index(fields=['hour'], name='fetchrollup_hour'),
+        ),
+        migrations.AddConstraint(
+            model_name='fetchloghourly',
+            constraint=models.UniqueConstraint(fields=('source', 'hour'), name='uniq_fetchrollup_source_hour'),
+        ),
+    ]
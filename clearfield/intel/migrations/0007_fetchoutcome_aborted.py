@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0006_fetchlog_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fetchlog',
+            name='outcome',
+            field=models.CharField(blank=True, choices=[('ok', 'Fetched and parsed'), ('not_modified', '304 Not Modified'), ('unchanged', 'Body unchanged (parse skipped)'), ('error', 'Error'), ('aborted', 'Aborted (size cap / content type)')], max_length=16),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0007_fetchoutcome_aborted'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('ok', models.BooleanField(default=False)),
+                ('stages', models.JSONField(default=dict)),
+                ('error', models.TextField(blank=True)),
+            ],
+        ),
+    ]
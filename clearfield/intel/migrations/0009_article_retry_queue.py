@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:40
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def queue_old_failures(apps, schema_editor):
+    # failures recorded before the retry queue were never retried: give them one more try
+    Article = apps.get_model("intel", "Article")
+    Article.objects.exclude(extract_error="").update(
+        attempts=1,
+        error_class="transient",
+        next_attempt_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0008_pipelinerun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='error_class',
+            field=models.CharField(blank=True, choices=[('', 'No error'), ('transient', 'Transient (retried with backoff)'), ('permanent', 'Permanent (not retried)')], default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(queue_old_failures, migrations.RunPython.noop),
+    ]
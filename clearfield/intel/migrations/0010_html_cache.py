@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0009_article_retry_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_key', models.CharField(max_length=64, unique=True)),
+                ('final_url', models.TextField()),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('stored_size', models.PositiveIntegerField(default=0)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='html_sha256',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
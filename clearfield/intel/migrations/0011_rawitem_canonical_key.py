@@ -0,0 +1,81 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:43
+
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.db import migrations, models
+
+
+# frozen copy of intel.canonical as of this migration: later changes to the
+# tracking list or normalisation must not change what this backfill writes
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "yclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "_hsenc", "_hsmi", "ref", "ref_src", "ref_url", "cmpid", "ncid",
+    "ito", "spm", "smid",
+})
+TRACKING_PREFIXES = ("utm_", "at_", "pk_", "mtm_", "oly_")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url):
+    url = (url or "").strip()
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if scheme not in DEFAULT_PORTS or not host:
+        return url
+
+    netloc = f"[{host}]" if ":" in host else host
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+
+    query = urlencode(
+        [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not is_tracking_param(k)]
+    )
+    return urlunsplit(("https", netloc, parts.path or "/", query, ""))
+
+
+def canonical_key(url):
+    canon = canonical_url(url)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest() if canon else ""
+
+
+def backfill_canonical_key(apps, schema_editor):
+    RawItem = apps.get_model("intel", "RawItem")
+    batch = []
+    for item in RawItem.objects.exclude(url="").only("id", "url").iterator(chunk_size=2000):
+        item.canonical_key = canonical_key(item.url)
+        batch.append(item)
+        if len(batch) >= 2000:
+            RawItem.objects.bulk_update(batch, ["canonical_key"])
+            batch = []
+    RawItem.objects.bulk_update(batch, ["canonical_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0010_html_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rawitem',
+            name='canonical_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.RunPython(backfill_canonical_key, migrations.RunPython.noop),
+    ]
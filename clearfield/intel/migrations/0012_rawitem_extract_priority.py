@@ -0,0 +1,65 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:47
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# frozen copy of intel.priority.item_priority and its weights as of this migration:
+# later re-weighting must not change what this backfill writes
+CLASS_WEIGHT = {"official": 40, "agency": 40, "stats": 30, "industry": 20, "commentary": 0}
+CADENCE_WEIGHT = {"hot": 20, "medium": 10, "cold": 0}
+EVENT_ITEM_WEIGHT = 5
+EVENT_ITEMS_CAP = 10
+
+CHUNK = 1000
+
+
+def item_priority(source_class, cadence, event_items=0):
+    heat = min(max(event_items - 1, 0), EVENT_ITEMS_CAP) * EVENT_ITEM_WEIGHT
+    return CLASS_WEIGHT.get(source_class, 0) + CADENCE_WEIGHT.get(cadence, 0) + heat
+
+
+def backfill_priority(apps, schema_editor):
+    RawItem = apps.get_model("intel", "RawItem")
+    Source = apps.get_model("intel", "Source")
+    EventItem = apps.get_model("intel", "EventItem")
+
+    pending = RawItem.objects.filter(article__isnull=True).exclude(url="")
+    # base priority: one UPDATE per source
+    for src in Source.objects.all():
+        pending.filter(source_id=src.id).update(extract_priority=item_priority(src.source_class, src.cadence))
+
+    # event heat for items already linked to multi-item events
+    sizes = dict(EventItem.objects.values_list("event_id").annotate(n=Count("id")).filter(n__gt=1))
+    if not sizes:
+        return
+    rows = pending.filter(event_item__event_id__in=list(sizes)).values_list(
+        "id", "source__source_class", "source__cadence", "event_item__event_id"
+    )
+    # one UPDATE per distinct priority value instead of one per row
+    by_priority = {}
+    for item_id, source_class, cadence, event_id in rows.iterator():
+        by_priority.setdefault(item_priority(source_class, cadence, sizes[event_id]), []).append(item_id)
+    for prio, ids in by_priority.items():
+        for i in range(0, len(ids), CHUNK):
+            RawItem.objects.filter(id__in=ids[i:i + CHUNK]).update(extract_priority=prio)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0011_rawitem_canonical_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rawitem',
+            name='extract_priority',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='rawitem',
+            index=models.Index(fields=['-extract_priority', '-published_at'], name='rawitem_extract_queue'),
+        ),
+        migrations.RunPython(backfill_priority, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0012_rawitem_extract_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='clean_len',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='is_placeholder',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='simhash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='token_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0013_article_text_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rawitem',
+            name='dup_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='near_dups', to='intel.rawitem'),
+        ),
+        migrations.AddField(
+            model_name='rawitem',
+            name='title_simhash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.9 on 2026-10-17 02:54
+
+from django.db import migrations, models
+
+FIELDS = ["simhash", "sh_band0", "sh_band1", "sh_band2", "sh_band3"]
+
+
+# frozen copies of the helpers as of this migration: later changes to
+# cluster_events / intel.simhash must not change what this backfill writes
+def parse_sh64_key(key):
+    try:
+        return int(key.split(":", 1)[1], 16)
+    except (IndexError, ValueError):
+        return None
+
+
+def event_simhash_fields(h):
+    # signed BIGINT + four 16-bit bands, low bits first
+    fields = {"simhash": h - (1 << 64) if h >= (1 << 63) else h}
+    for i in range(4):
+        fields[f"sh_band{i}"] = (h >> (16 * i)) & 0xFFFF
+    return fields
+
+
+def backfill_simhash(apps, schema_editor):
+    Event = apps.get_model("intel", "Event")
+    batch = []
+    for ev_id, key in Event.objects.filter(cluster_key__startswith="sh64:").values_list("id", "cluster_key").iterator():
+        h = parse_sh64_key(key)
+        if h is None:
+            continue
+        batch.append(Event(id=ev_id, **event_simhash_fields(h)))
+        if len(batch) >= 1000:
+            Event.objects.bulk_update(batch, FIELDS)
+            batch = []
+    if batch:
+        Event.objects.bulk_update(batch, FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intel', '0014_rawitem_near_dup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='sh_band0',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='sh_band1',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='sh_band2',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='sh_band3',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='simhash',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_simhash, migrations.RunPython.noop),
+    ]
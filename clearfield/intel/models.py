@@ -29,6 +29,20 @@ class Cadence(models.TextChoices):
     COLD = "cold", "Cold (6–24h)"
 
 
+class FetchOutcome(models.TextChoices):
+    OK = "ok", "Fetched and parsed"
+    NOT_MODIFIED = "not_modified", "304 Not Modified"
+    UNCHANGED = "unchanged", "Body unchanged (parse skipped)"
+    ERROR = "error", "Error"
+    ABORTED = "aborted", "Aborted (size cap / content type)"
+
+
+class ExtractErrorClass(models.TextChoices):
+    NONE = "", "No error"
+    TRANSIENT = "transient", "Transient (retried with backoff)"
+    PERMANENT = "permanent", "Permanent (not retried)"
+
+
 class Source(models.Model):
     name = models.CharField(max_length=200)
     url = models.URLField(unique=True)
@@ -43,6 +57,8 @@ class Source(models.Model):
 
     etag = models.CharField(max_length=300, null=True, blank=True)
     last_modified = models.CharField(max_length=300, null=True, blank=True)
+    # sha256 последнего распарсенного тела фида
+    content_hash = models.CharField(max_length=64, blank=True, default="")
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -57,13 +73,104 @@ class FetchLog(models.Model):
     status_code = models.IntegerField(null=True, blank=True)
     elapsed_ms = models.IntegerField(null=True, blank=True)
     bytes_received = models.IntegerField(null=True, blank=True)
+    outcome = models.CharField(max_length=16, choices=FetchOutcome.choices, blank=True)
+    items_new = models.IntegerField(null=True, blank=True)
 
     error = models.TextField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["source", "-fetched_at"], name="fetchlog_source_time"),
+            models.Index(fields=["fetched_at"], name="fetchlog_time"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.source_id} {self.status_code} {self.fetched_at:%Y-%m-%d %H:%M}"
 
 
+# upper bounds (ms) of the latency histogram in FetchLogHourly; last bucket is open-ended
+LATENCY_BUCKETS_MS = [50, 100, 200, 400, 800, 1600, 3200, 6400, 12800, 25600]
+
+
+class FetchLogHourly(models.Model):
+    """Per-source hourly rollup of FetchLog, updated incrementally when logs are flushed."""
+
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="fetch_rollups")
+    hour = models.DateTimeField()
+
+    fetches = models.IntegerField(default=0)
+    # by status class; `errors` = no HTTP status (DNS, timeout, ...)
+    status_2xx = models.IntegerField(default=0)
+    status_3xx = models.IntegerField(default=0)
+    status_4xx = models.IntegerField(default=0)
+    status_5xx = models.IntegerField(default=0)
+    errors = models.IntegerField(default=0)
+
+    unchanged = models.IntegerField(default=0)
+    items_new = models.IntegerField(default=0)
+    bytes_received = models.BigIntegerField(default=0)
+
+    elapsed_ms_total = models.BigIntegerField(default=0)
+    max_ms = models.IntegerField(default=0)
+    latency_hist = models.JSONField(default=list)
+    p50_ms = models.IntegerField(null=True, blank=True)
+    p95_ms = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source", "hour"], name="uniq_fetchrollup_source_hour")
+        ]
+        indexes = [models.Index(fields=["hour"], name="fetchrollup_hour")]
+
+    def __str__(self) -> str:
+        return f"{self.source_id} {self.hour:%Y-%m-%d %H}:00 n={self.fetches}"
+
+    def add(self, log: FetchLog):
+        self.fetches += 1
+        code = log.status_code
+        if code is None:
+            self.errors += 1
+        elif 200 <= code < 300:
+            self.status_2xx += 1
+        elif 300 <= code < 400:
+            self.status_3xx += 1
+        elif 400 <= code < 500:
+            self.status_4xx += 1
+        else:
+            self.status_5xx += 1
+
+        if log.outcome in (FetchOutcome.NOT_MODIFIED, FetchOutcome.UNCHANGED):
+            self.unchanged += 1
+        self.items_new += log.items_new or 0
+        self.bytes_received += log.bytes_received or 0
+
+        elapsed = log.elapsed_ms or 0
+        self.elapsed_ms_total += elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+        hist = list(self.latency_hist or [])
+        hist += [0] * (len(LATENCY_BUCKETS_MS) + 1 - len(hist))
+        idx = next((i for i, ub in enumerate(LATENCY_BUCKETS_MS) if elapsed <= ub), len(LATENCY_BUCKETS_MS))
+        hist[idx] += 1
+        self.latency_hist = hist
+
+        self.p50_ms = self.hist_percentile(50)
+        self.p95_ms = self.hist_percentile(95)
+
+    def hist_percentile(self, pct: float) -> int | None:
+        """Upper bound of the histogram bucket holding the pct-th fetch (open last bucket: max_ms)."""
+        hist = self.latency_hist or []
+        total = sum(hist)
+        if not total:
+            return None
+        need = total * pct / 100
+        seen = 0
+        for i, n in enumerate(hist):
+            seen += n
+            if seen >= need:
+                return min(LATENCY_BUCKETS_MS[i], self.max_ms) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
 class RawItem(models.Model):
     source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="items")
 
@@ -75,12 +182,25 @@ class RawItem(models.Model):
 
     # дедуп ключ
     item_hash = models.CharField(max_length=64, db_index=True)
+    # sha256(canonical_url(url)): one download per story across syndicating feeds
+    canonical_key = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    # extraction queue order (intel.priority); NULL = nothing to extract
+    extract_priority = models.SmallIntegerField(null=True, blank=True)
+    # SimHash of title+summary (signed 64-bit) and the earlier item it near-duplicates (intel.neardup)
+    title_simhash = models.BigIntegerField(null=True, blank=True)
+    dup_of = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.SET_NULL, related_name="near_dups"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=["source", "item_hash"], name="uniq_source_itemhash")
         ]
+        indexes = [
+            # top-N pending items without sorting the backlog
+            models.Index(fields=["-extract_priority", "-published_at"], name="rawitem_extract_queue"),
+        ]
 
     def __str__(self) -> str:
         return self.title[:80]
@@ -98,10 +218,38 @@ class Article(models.Model):
     extracted_at = models.DateTimeField(null=True, blank=True)
     extract_error = models.TextField(blank=True)
 
+    # retry queue: next_attempt_at is set only while a transient failure is still retryable
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error_class = models.CharField(max_length=16, choices=ExtractErrorClass.choices, blank=True, default="")
+    next_attempt_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    # sha256 of the raw HTML in HTML_CACHE_DIR (intel.htmlcache); empty = not cached
+    html_sha256 = models.CharField(max_length=64, blank=True, default="")
+
+    # derived from text at extraction time (intel.textfeatures); token_count NULL = not computed yet
+    clean_len = models.PositiveIntegerField(null=True, blank=True)
+    token_count = models.PositiveIntegerField(null=True, blank=True)
+    simhash = models.BigIntegerField(null=True, blank=True)  # 64-bit SimHash, stored signed
+    is_placeholder = models.BooleanField(default=False)
+
     def __str__(self) -> str:
         return f"Article for item {self.item_id}"
 
 
+class CachedPage(models.Model):
+    """Final URL -> latest cached HTML digest (see intel.htmlcache)."""
+
+    url_key = models.CharField(max_length=64, unique=True)  # sha256(final_url)
+    final_url = models.TextField()
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveIntegerField(default=0)  # html bytes
+    stored_size = models.PositiveIntegerField(default=0)  # compressed bytes on disk
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.sha256[:12]} {self.final_url[:80]}"
+
+
 class Event(models.Model):
     EVIDENCE_CHOICES = [
         (0, "0: anonymous/insider"),
@@ -125,6 +273,13 @@ class Event(models.Model):
 
     # для дедупа/склейки
     cluster_key = models.CharField(max_length=64, db_index=True, unique=True)
+    # SimHash of the "sh64:" key (signed 64-bit) and its four 16-bit bands (low bits first):
+    # cluster_events fetches only events sharing a band with the incoming batch
+    simhash = models.BigIntegerField(null=True, blank=True, db_index=True)
+    sh_band0 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    sh_band1 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    sh_band2 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    sh_band3 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         return f"Event #{self.id} L{self.evidence_level}: {self.title[:60]}"
@@ -138,3 +293,29 @@ class EventItem(models.Model):
 
     def __str__(self):
         return f"EventItem event={self.event_id} item={self.item_id}"
+
+
+class PipelineRun(models.Model):
+    """One run_pipeline invocation: per-stage timings and delta sizes."""
+
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    ok = models.BooleanField(default=False)
+
+    # {"ingest": {"ms": 812, "queries": 95, "out": 37}, "extract": {...}, ...}
+    stages = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"PipelineRun #{self.id} {self.started_at:%Y-%m-%d %H:%M} ok={self.ok}"
+
+
+class Watermark(models.Model):
+    """Named high-water mark of an incremental job (e.g. cluster_events)."""
+
+    name = models.CharField(max_length=64, unique=True)
+    value = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.value:%Y-%m-%d %H:%M:%S}"
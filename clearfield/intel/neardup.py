@@ -0,0 +1,105 @@
+"""
+Ingest-time near-duplicate detection: wire stories syndicated under different URLs
+usually keep the title/summary. A SimHash of title+summary is checked against an
+in-memory index of recent representative items; a hit links the new RawItem to
+that representative (RawItem.dup_of) and drops it to the bottom of the extraction queue.
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from intel.models import RawItem
+from intel.simhash import band_keys, from_signed64, hamming64, simhash64, tokenize
+
+
+# titles alone are short: below this the hash is too noisy to trust
+MIN_TOKENS = 8
+MAX_DIST = 3
+WINDOW = timedelta(hours=48)
+
+PRUNE_EVERY = 1000
+
+
+def title_simhash(title: str, summary: str) -> int | None:
+    """Unsigned 64-bit SimHash of title + summary; None when there is too little text."""
+    toks = tokenize(f"{title or ''} {summary or ''}")
+    if len(toks) < MIN_TOKENS:
+        return None
+    return simhash64(toks)
+
+
+class NearDupIndex:
+    """
+    Representative items of the last `window`, bucketed by band like
+    intel.simhash.SimHashIndex (max_dist + 1 bands), with expiry.
+    """
+
+    def __init__(self, window: timedelta = WINDOW, max_dist: int = MAX_DIST):
+        self.window = window.total_seconds()
+        self.max_dist = max_dist
+        self.n_bands = max_dist + 1
+        self._buckets: dict[tuple[int, int], list[tuple[int, int, float]]] = defaultdict(list)
+        self._adds = 0
+        self.size = 0
+
+    def add(self, item_id: int, h: int, ts: float | None = None):
+        entry = (item_id, h, time.time() if ts is None else ts)
+        for key in band_keys(h, self.n_bands):
+            self._buckets[key].append(entry)
+        self.size += 1
+        self._adds += 1
+        if self._adds % PRUNE_EVERY == 0:
+            self.prune()
+
+    def find(self, h: int) -> int | None:
+        """Closest representative within max_dist (oldest wins ties), else None."""
+        cutoff = time.time() - self.window
+        best = None
+        for key in band_keys(h, self.n_bands):
+            for item_id, other, ts in self._buckets.get(key, ()):
+                if ts < cutoff:
+                    continue
+                d = hamming64(h, other)
+                if d <= self.max_dist and (best is None or (d, item_id) < best):
+                    best = (d, item_id)
+        return best[1] if best else None
+
+    def prune(self):
+        cutoff = time.time() - self.window
+        live = set()
+        for key in list(self._buckets):
+            kept = [e for e in self._buckets[key] if e[2] >= cutoff]
+            if kept:
+                self._buckets[key] = kept
+                live.update(e[0] for e in kept)
+            else:
+                del self._buckets[key]
+        self.size = len(live)
+
+    def seed(self) -> int:
+        """Load recent representatives from the DB (fresh process)."""
+        since = timezone.now() - timedelta(seconds=self.window)
+        rows = (
+            RawItem.objects
+            .filter(created_at__gte=since, title_simhash__isnull=False, dup_of__isnull=True)
+            .values_list("id", "title_simhash", "created_at")
+        )
+        n = 0
+        for item_id, h, created_at in rows.iterator():
+            self.add(item_id, from_signed64(h), created_at.timestamp())
+            n += 1
+        return n
+
+
+_index: NearDupIndex | None = None
+
+
+def get_index() -> NearDupIndex:
+    # one per process; upsert_items runs on the single thread-sensitive ORM thread
+    global _index
+    if _index is None:
+        _index = NearDupIndex()
+        _index.seed()
+    return _index
@@ -0,0 +1,66 @@
+"""
+Extraction priority of pending RawItems (RawItem.extract_priority).
+
+NULL means "not pending" (extracted, or nothing to extract); the picker in
+extract_articles reads the top of the (extract_priority, published_at) index.
+"""
+from django.db.models import Count
+
+from intel.models import Cadence, EventItem, RawItem, SourceClass
+
+
+CLASS_WEIGHT = {
+    SourceClass.OFFICIAL: 40,
+    SourceClass.AGENCY: 40,
+    SourceClass.STATS: 30,
+    SourceClass.INDUSTRY: 20,
+    SourceClass.COMMENTARY: 0,
+}
+CADENCE_WEIGHT = {
+    Cadence.HOT: 20,
+    Cadence.MEDIUM: 10,
+    Cadence.COLD: 0,
+}
+# per extra item in the item's event, capped: multi-source stories jump the queue
+EVENT_ITEM_WEIGHT = 5
+EVENT_ITEMS_CAP = 10
+
+# near-duplicates of an already queued story (intel.neardup): extracted only when nothing else is pending
+DUPLICATE_PRIORITY = -100
+
+CHUNK = 1000
+
+
+def item_priority(source_class: str, cadence: str, event_items: int = 0) -> int:
+    heat = min(max(event_items - 1, 0), EVENT_ITEMS_CAP) * EVENT_ITEM_WEIGHT
+    return CLASS_WEIGHT.get(source_class, 0) + CADENCE_WEIGHT.get(cadence, 0) + heat
+
+
+def refresh_event_priorities(event_ids) -> int:
+    """Recompute priority of still-pending items linked to these events; returns rows updated."""
+    event_ids = list(event_ids)
+    if not event_ids:
+        return 0
+
+    sizes = dict(
+        EventItem.objects
+        .filter(event_id__in=event_ids)
+        .values_list("event_id")
+        .annotate(n=Count("id"))
+    )
+    rows = (
+        RawItem.objects
+        .filter(event_item__event_id__in=event_ids, extract_priority__isnull=False, dup_of__isnull=True)
+        .values_list("id", "source__source_class", "source__cadence", "event_item__event_id")
+    )
+
+    # one UPDATE per distinct priority value instead of one per row
+    by_priority: dict[int, list[int]] = {}
+    for item_id, source_class, cadence, event_id in rows:
+        by_priority.setdefault(item_priority(source_class, cadence, sizes.get(event_id, 0)), []).append(item_id)
+
+    updated = 0
+    for prio, ids in by_priority.items():
+        for i in range(0, len(ids), CHUNK):
+            updated += RawItem.objects.filter(id__in=ids[i:i + CHUNK]).update(extract_priority=prio)
+    return updated
@@ -0,0 +1,201 @@
+"""
+Text normalisation and 64-bit SimHash shared by cluster_events, the ingest-time
+near-duplicate check (intel.neardup) and the per-article features (intel.textfeatures):
+tokenize, simhash64 / simhash64_batch, signed BIGINT conversion and the banded
+multi-index Hamming search.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# -----------------------------
+# Text cleanup / tokenization
+# -----------------------------
+NOISE_PHRASES = [
+    "One of your browser extensions seems to be blocking the video player",
+    "To watch this content, you may need to disable it on this site",
+    "Follow our liveblog",
+    "for all the latest developments.",
+    "for all the latest updates.",
+    "from loading.",
+    "from loading. .",
+    "from loading. . from loading.",
+]
+
+NOISE_RE = [
+    r"\bLive:\s*",
+    r"\bFollow (our )?liveblog.*$",
+    r"\bfrom loading\.(\s*\.)*",
+]
+
+WORD_RE = re.compile(r"[a-zA-Z0-9]+", re.UNICODE)
+
+# simhash64_batch: upper bound on token x bit cells gathered at once (~16 MB of uint8)
+BATCH_MAX_CELLS = 16 * 1024 * 1024
+
+
+def sanitize(text: str) -> str:
+    t = (text or "").strip()
+    for p in NOISE_PHRASES:
+        t = t.replace(p, " ")
+    for rx in NOISE_RE:
+        t = re.sub(rx, " ", t, flags=re.IGNORECASE)
+    t = re.sub(r"\s+", " ", t).strip()
+    return t
+
+
+def tokenize(text: str) -> List[str]:
+    # Lower + keep only word-ish tokens
+    t = sanitize(text).lower()
+    return WORD_RE.findall(t)
+
+
+# -----------------------------
+# SimHash (64-bit)
+# -----------------------------
+def _hash64(token: str) -> int:
+    # Stable 64-bit from md5 (fast + stable)
+    h = hashlib.md5(token.encode("utf-8")).digest()
+    return int.from_bytes(h[:8], byteorder="big", signed=False)
+
+
+def simhash64(tokens: Iterable[str]) -> int:
+    # Classic SimHash: signed bit weights
+    v = [0] * 64
+    for tok in tokens:
+        x = _hash64(tok)
+        for i in range(64):
+            bit = (x >> i) & 1
+            v[i] += 1 if bit else -1
+    out = 0
+    for i in range(64):
+        if v[i] >= 0:
+            out |= (1 << i)
+    return out
+
+
+def simhash64_batch(docs: Sequence[Sequence[str]], max_cells: int = BATCH_MAX_CELLS) -> List[int]:
+    """
+    simhash64() for many token lists at once, bit-identical to it: every distinct token
+    is md5-hashed once, hashes are unpacked into a (tokens x 64) bit matrix and the
+    per-document bit votes are summed with NumPy.
+    """
+    if not docs:
+        return []
+
+    vocab: Dict[str, int] = {}
+    ids = np.fromiter(
+        (vocab.setdefault(tok, len(vocab)) for doc in docs for tok in doc),
+        dtype=np.int64,
+    )
+    hashes = np.fromiter((_hash64(tok) for tok in vocab), dtype=np.uint64, count=len(vocab))
+    # little-endian bytes + little bit order: column i is bit i of the hash
+    bits = np.unpackbits(hashes.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+
+    lengths = np.fromiter((len(doc) for doc in docs), dtype=np.int64, count=len(docs))
+    ends = np.cumsum(lengths)
+    ones = np.zeros((len(docs), 64), dtype=np.int64)
+
+    # gather in slices of whole documents so the (tokens x 64) matrix stays bounded
+    step = max(1, max_cells // 64)
+    start_doc = 0
+    while start_doc < len(docs):
+        tok_start = ends[start_doc] - lengths[start_doc]
+        end_doc = int(np.searchsorted(ends, tok_start + step, side="right"))
+        end_doc = max(end_doc, start_doc + 1)
+        nonempty = np.nonzero(lengths[start_doc:end_doc])[0] + start_doc
+        if len(nonempty):
+            tok_end = ends[end_doc - 1]
+            offsets = ends[nonempty] - lengths[nonempty] - tok_start
+            chunk = bits[ids[tok_start:tok_end]]
+            ones[nonempty] = np.add.reduceat(chunk, offsets, axis=0, dtype=np.int64)
+        start_doc = end_doc
+
+    # simhash64: +1 per set bit, -1 per clear bit, bit set when the sum >= 0
+    set_bits = (2 * ones - lengths[:, None]) >= 0
+    weights = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+    out = (set_bits.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+    return [int(h) for h in out]
+
+
+def to_signed64(h: int) -> int:
+    # BIGINT columns are signed: store the same 64 bits
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def from_signed64(v: int) -> int:
+    return v & 0xFFFFFFFFFFFFFFFF
+
+
+def hamming64(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def band_layout(n_bands: int) -> List[Tuple[int, int]]:
+    """(shift, mask) of n_bands contiguous bit ranges covering all 64 bits."""
+    layout = []
+    lo = 0
+    for i in range(n_bands):
+        width = 64 // n_bands + (1 if i < 64 % n_bands else 0)
+        layout.append((lo, (1 << width) - 1))
+        lo += width
+    return layout
+
+
+def band_keys(h: int, n_bands: int) -> List[Tuple[int, int]]:
+    """(band number, band value) per band of band_layout(n_bands)."""
+    return [(i, (h >> shift) & mask) for i, (shift, mask) in enumerate(band_layout(n_bands))]
+
+
+class SimHashIndex:
+    """
+    Multi-index Hamming search: with max_dist + 1 bands, any two hashes within max_dist
+    agree on at least one whole band (pigeonhole), so looking up the query's band
+    values finds every match; candidates are then verified with hamming64().
+    """
+
+    def __init__(self, max_dist: int):
+        self.max_dist = max(0, max_dist)
+        self.n_bands = min(64, self.max_dist + 1)
+        self._layout = band_layout(self.n_bands)
+        self._tables: List[Dict[int, List[Tuple[int, int, object]]]] = [defaultdict(list) for _ in range(self.n_bands)]
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return self._seq
+
+    def add(self, h: int, obj) -> None:
+        entry = (self._seq, h, obj)
+        self._seq += 1
+        for table, (shift, mask) in zip(self._tables, self._layout):
+            table[(h >> shift) & mask].append(entry)
+
+    def nearest(self, h: int):
+        """Closest object within max_dist (earliest added wins ties), else None."""
+        best = None
+        for table, (shift, mask) in zip(self._tables, self._layout):
+            for seq, other, obj in table.get((h >> shift) & mask, ()):
+                d = (h ^ other).bit_count()
+                if d <= self.max_dist and (best is None or (d, seq) < best[:2]):
+                    best = (d, seq, obj)
+        return best[2] if best else None
+
+
+def sh64_key(h: int) -> str:
+    # compact stable cluster key
+    return f"sh64:{h:016x}"
+
+
+def parse_sh64_key(key: str) -> Optional[int]:
+    if not (key or "").startswith("sh64:"):
+        return None
+    try:
+        return int(key.split(":", 1)[1], 16)
+    except ValueError:
+        return None
@@ -1,3 +1,577 @@
-from django.test import TestCase
+import asyncio
+import random
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import feedparser
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from lxml import etree
+
+from intel import feeds, neardup
+from intel.canonical import canonical_key, canonical_url
+from intel.feeds import FastPathUnsupported, parse_feed, parse_feed_fast, parse_feed_full
+from intel.management.commands.cluster_events import Command as ClusterCommand
+from intel.management.commands.cluster_events import event_simhash_fields, load_candidate_events
+from intel.management.commands import extract_articles
+from intel.management.commands.extract_articles import (
+    MAX_ATTEMPTS,
+    RETRY_BASE,
+    ArticleWriter,
+    group_by_canonical,
+    load_known_articles,
+    next_attempt_time,
+    pick_items,
+)
+from intel.management.commands.ingest_feeds import upsert_items
+from intel.models import Article, Event, EventItem, RawItem, Source, Watermark
+from intel.priority import DUPLICATE_PRIORITY
+from intel.simhash import SimHashIndex, from_signed64, hamming64, sh64_key, simhash64, simhash64_batch
+from intel.textfeatures import text_features
+
+
+def make_source(url="https://example.com/feed", **kwargs) -> Source:
+    fields = dict(name=url, region="EU", topic="economy", source_class="agency")
+    fields.update(kwargs)
+    return Source.objects.create(url=url, **fields)
+
+
+class SimHashBatchTests(SimpleTestCase):
+    def setUp(self):
+        rnd = random.Random(1)
+        vocab = [f"w{i}" for i in range(300)]
+        self.docs = [rnd.choices(vocab, k=rnd.randint(0, 60)) for _ in range(40)]
+        # empty documents at the edges and in the middle, repeated tokens
+        self.docs[:0] = [[]]
+        self.docs[20:20] = [[], ["same"] * 7, ["a", "b", "a", "a", "b"]]
+        self.docs.append([])
+
+    def expected(self, docs):
+        return [simhash64(d) for d in docs]
+
+    def test_matches_scalar(self):
+        self.assertEqual(simhash64_batch(self.docs), self.expected(self.docs))
+
+    def test_chunked(self):
+        # a few tokens per slice: documents span many slices, slices hold empty docs only
+        for max_cells in (64, 128, 64 * 7, 64 * 100):
+            with self.subTest(max_cells=max_cells):
+                self.assertEqual(simhash64_batch(self.docs, max_cells=max_cells), self.expected(self.docs))
+
+    def test_empty_inputs(self):
+        self.assertEqual(simhash64_batch([]), [])
+        self.assertEqual(simhash64_batch([[], []]), self.expected([[], []]))
+        self.assertEqual(simhash64_batch([["only"]]), [simhash64(["only"])])
+
+
+class CanonicalUrlTests(SimpleTestCase):
+    def test_normalizes(self):
+        cases = {
+            "HTTP://Example.COM/a/b?id=3#frag": "https://example.com/a/b?id=3",
+            "https://example.com:443/x": "https://example.com/x",
+            "http://example.com:80": "https://example.com/",
+            "https://example.com:8443/x": "https://example.com:8443/x",
+            "https://example.com./x": "https://example.com/x",
+            "https://[2001:db8::1]:8080/x": "https://[2001:db8::1]:8080/x",
+            "  https://example.com/x  ": "https://example.com/x",
+        }
+        for url, want in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(canonical_url(url), want)
+
+    def test_drops_tracking_params_only(self):
+        url = "https://example.com/p?utm_source=rss&b=2&fbclid=x&UTM_Medium=y&a=1&ref=home&page="
+        self.assertEqual(canonical_url(url), "https://example.com/p?b=2&a=1&page=")
+
+    def test_leaves_unsupported_urls(self):
+        for url in ("ftp://example.com/x", "mailto:a@example.com", "/relative/path", "https://example.com:bad/x"):
+            with self.subTest(url=url):
+                self.assertEqual(canonical_url(url), url)
+        self.assertEqual(canonical_url(""), "")
+
+    def test_key(self):
+        self.assertEqual(
+            canonical_key("http://Example.com/story?utm_campaign=x"),
+            canonical_key("https://example.com/story#comments"),
+        )
+        self.assertNotEqual(canonical_key("https://example.com/a"), canonical_key("https://example.com/b"))
+        self.assertEqual(len(canonical_key("https://example.com/a")), 64)
+        self.assertEqual(canonical_key(""), "")
+
+
+class ExtractOncePerCanonicalTests(TestCase):
+    def setUp(self):
+        self.source = make_source()
+
+    def item(self, n, url):
+        return RawItem.objects.create(
+            source=self.source, item_hash=f"c{n}", url=url, canonical_key=canonical_key(url)
+        )
+
+    def test_group_by_canonical(self):
+        a = self.item(1, "https://example.com/story?utm_source=rss")
+        b = self.item(2, "http://example.com/story#top")
+        c = self.item(3, "https://example.com/other")
+        self.assertEqual(group_by_canonical([a, c, b]), [[a, b], [c]])
+
+    def test_known_articles(self):
+        with_features = self.item(1, "https://example.com/a")
+        Article.objects.create(item=with_features, text="body", clean_len=4, token_count=1, simhash=-5)
+        legacy = self.item(2, "https://example.com/b")
+        Article.objects.create(item=legacy, text="old body")
+        failed = self.item(3, "https://example.com/c")
+        Article.objects.create(item=failed, text="", extract_error="HTTP 500")
+
+        known = async_to_sync(load_known_articles)([with_features.canonical_key, legacy.canonical_key, failed.canonical_key])
+        self.assertEqual(set(known), {with_features.canonical_key, legacy.canonical_key})
+        self.assertEqual(
+            known[with_features.canonical_key].features,
+            {"clean_len": 4, "token_count": 1, "simhash": -5, "is_placeholder": False},
+        )
+        # computed later by article_fields()
+        self.assertFalse(known[legacy.canonical_key].features)
+
+
+RSS = """<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"><channel><title>t</title>
+{items}
+</channel></rss>"""
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>t</title><id>f</id>
+{entries}
+</feed>"""
+
+
+def rss_item(i, title, description, link=None):
+    link = link or f"https://example.com/{i}"
+    return (
+        f"<item><title>{title}</title><link>{link}</link><guid isPermaLink=\"false\">g{i}</guid>"
+        f"<pubDate>Sat, 17 Oct 2026 0{i % 10}:00:00 GMT</pubDate><description>{description}</description></item>"
+    )
+
+
+def atom_entry(i, title, summary, title_type="", summary_type=""):
+    return (
+        f"<entry><id>e{i}</id><title{title_type}>{title}</title>"
+        f"<link rel=\"alternate\" type=\"text/html\" href=\"https://example.com/{i}\"/>"
+        f"<updated>2026-10-17T0{i % 10}:00:00Z</updated><summary{summary_type}>{summary}</summary></entry>"
+    )
+
+
+class FastFeedParserTests(SimpleTestCase):
+    def assertParity(self, doc: str):
+        data = doc.encode("utf-8")
+        full = parse_feed_full(data)
+        self.assertTrue(full)
+        self.assertEqual(parse_feed_fast(data), full)
+
+    def test_rss_markup(self):
+        items = [
+            rss_item(0, "AT&amp;T to cut jobs", "Plain text &amp; more &lt; less &gt; none"),
+            rss_item(1, "<![CDATA[Tom & Jerry]]>", "<![CDATA[<p>Hello <b>world</b></p><p>Two</p>]]>"),
+            rss_item(2, "Q&amp;A: rates &#8217;26", "<![CDATA[<img src=\"/rel.png\"> <a href=\"https://x.com/?a=1&b=2\">l</a>]]>"),
+            rss_item(3, "&lt;b&gt;Live&lt;/b&gt;: talks", "<![CDATA[<script>track()</script>ok a <br> b]]>"),
+            rss_item(4, "<![CDATA[a < b]]>", "&lt;p&gt;Escaped &amp;amp; HTML&lt;/p&gt;", link="https://example.com/4?a=1&amp;b=2"),
+            rss_item(5, "Café &quot;quoted&quot;", "<![CDATA[Wordpress tail [&#8230;]]]>"),
+        ]
+        self.assertParity(RSS.format(items="\n".join(items)))
+
+    def test_content_encoded(self):
+        item = (
+            "<item><title>t</title><link>https://example.com/c</link>"
+            "<content:encoded><![CDATA[<p>Body &amp; <em>more</em></p>]]></content:encoded></item>"
+        )
+        self.assertParity(RSS.format(items=item))
+
+    def test_atom_text_and_html(self):
+        entries = [
+            atom_entry(0, "AT&amp;T &lt;3", "a &amp; b &lt;p&gt;not html&lt;/p&gt;"),
+            atom_entry(1, "&lt;b&gt;B&lt;/b&gt;", "&lt;p&gt;x&lt;/p&gt;&lt;script&gt;s()&lt;/script&gt;",
+                       title_type=' type="html"', summary_type=' type="html"'),
+            atom_entry(2, "<![CDATA[<i>i</i> & j]]>", "<![CDATA[<p>c</p>]]>",
+                       title_type=' type="text"', summary_type=' type="html"'),
+        ]
+        self.assertParity(ATOM.format(entries="\n".join(entries)))
+
+    def test_falls_back(self):
+        docs = [
+            # feedparser re-decodes latin-1-looking UTF-8
+            RSS.format(items=rss_item(0, "CafÃ©", "x")),
+            # relative links resolve against xml:base
+            ATOM.format(entries=atom_entry(0, "t", "s")).replace("<feed ", '<feed xml:base="https://example.com/" '),
+            ATOM.format(entries=atom_entry(0, "t", "<div>x</div>", summary_type=' type="xhtml"')),
+        ]
+        for doc in docs:
+            data = doc.encode("utf-8")
+            with self.subTest(doc=doc[-200:]):
+                with self.assertRaises(FastPathUnsupported):
+                    parse_feed_fast(data)
+                self.assertEqual(parse_feed(data, fast=True), parse_feed_full(data))
+
+
+class FeedparserInternalsTests(SimpleTestCase):
+    """The fast path reuses private feedparser functions: fail loudly when an upgrade changes them."""
+
+    SNIPPETS = [
+        "<p>Hello <b>world</b></p>",
+        "Q&A: 5 < 6 > 4",
+        "AT&T",
+        '<img src="/rel.png"> <a href="https://x.com/?a=1&b=2">l</a>',
+        "<script>track()</script>ok a <br> b",
+        '<p style="color:red" onclick="x()">s</p><iframe src="https://v.example.com"></iframe>',
+        "&nbsp;x &copy; [&#8230;]",
+    ]
+
+    def test_pinned_version(self):
+        requirements = Path(__file__).resolve().parent.parent / "requirements.txt"
+        pins = dict(
+            line.split("==", 1) for line in requirements.read_text().splitlines() if "==" in line and not line.startswith("#")
+        )
+        self.assertEqual(feedparser.__version__, pins["feedparser"])
+
+    def test_html_pass_matches_feedparser(self):
+        for snippet in self.SNIPPETS:
+            with self.subTest(snippet=snippet):
+                doc = RSS.format(items=rss_item(0, "t", f"<![CDATA[{snippet}]]>"))
+                self.assertEqual(feeds._html(snippet), feedparser.parse(doc.encode()).entries[0].summary)
+
+    def test_title_heuristic_matches_feedparser(self):
+        for snippet in self.SNIPPETS:
+            with self.subTest(snippet=snippet):
+                doc = RSS.format(items=rss_item(0, f"<![CDATA[{snippet}]]>", "d"))
+                title = etree.fromstring(doc.encode()).find("channel/item/title")
+                self.assertEqual(feeds._rss_title(title), feedparser.parse(doc.encode()).entries[0].title)
+
+
+class IngestNearDupTests(TestCase):
+    def setUp(self):
+        neardup._index = neardup.NearDupIndex()
+        self.source = make_source()
+
+    def tearDown(self):
+        neardup._index = None
+
+    def payload(self, n, title):
+        summary = "Ministers agreed a new gas storage target for the coming winter after long talks"
+        return {"item_hash": f"h{n}", "guid": f"g{n}", "url": f"https://example.com/{n}", "title": title, "summary": summary}
+
+    def test_duplicates_within_one_batch(self):
+        items = [
+            self.payload(1, "EU agrees gas storage deal"),
+            self.payload(2, "Unrelated: central bank holds rates steady as inflation cools"),
+            self.payload(3, "EU agrees gas storage deal"),
+        ]
+        self.assertEqual(async_to_sync(upsert_items)(self.source.id, items, 50), (3, 0))
+
+        rows = {r.item_hash: r for r in RawItem.objects.filter(source=self.source)}
+        self.assertIsNone(rows["h1"].dup_of_id)
+        self.assertEqual(rows["h1"].extract_priority, 50)
+        self.assertEqual(rows["h3"].dup_of_id, rows["h1"].id)
+        self.assertEqual(rows["h3"].extract_priority, DUPLICATE_PRIORITY)
+        self.assertIsNone(rows["h2"].dup_of_id)
+
+        # the batch representative is in the shared index for the next feed
+        async_to_sync(upsert_items)(self.source.id, [self.payload(4, "EU agrees gas storage deal")], 50)
+        self.assertEqual(RawItem.objects.get(item_hash="h4").dup_of_id, rows["h1"].id)
+
+
+STORY_WORDS = (
+    "grid operators warned that the cold snap could strain gas storage across central europe "
+    "while ministers met in brussels to agree emergency measures on prices subsidies and exports "
+    "after weeks of talks analysts said markets had already priced in most of the supply risk"
+).split()
+
+
+def make_item(source, n, text, title="", **kwargs) -> RawItem:
+    """RawItem with an extracted Article whose text features are filled in, like extract_articles does."""
+    item = RawItem.objects.create(source=source, item_hash=f"i{n}", url=f"https://example.com/{n}", title=title, **kwargs)
+    Article.objects.create(item=item, title=title, text=text, extracted_at=timezone.now(), **text_features(text))
+    return item
+
+
+class ClusterWriteTests(TestCase):
+    def setUp(self):
+        self.source = make_source(region="EU", topic="economy")
+
+    def test_reused_key_is_enriched(self):
+        text = " ".join(STORY_WORDS)
+        item = make_item(self.source, 1, text, title="Ministers agree emergency gas measures")
+        h = from_signed64(item.article.simhash)
+        # an event written before the simhash columns: same key, not found by the band lookup
+        legacy = Event.objects.create(cluster_key=sh64_key(h), title="Gas", region="", topic="")
+
+        events, linked, touched = ClusterCommand().link_items([item], max_dist=3)
+
+        self.assertEqual((events, linked, touched), (0, 1, {legacy.id}))
+        legacy.refresh_from_db()
+        self.assertEqual(
+            (legacy.title, legacy.region, legacy.topic),
+            ("Ministers agree emergency gas measures", "EU", "economy"),
+        )
+        self.assertEqual(EventItem.objects.get(item=item).event_id, legacy.id)
+
+
+class ClusterWatermarkTests(TestCase):
+    def arrive(self, item, hours_ago):
+        at = timezone.now() - timedelta(hours=hours_ago)
+        RawItem.objects.filter(pk=item.pk).update(created_at=at)
+        Article.objects.filter(item=item).update(extracted_at=at)
+
+    def test_limited_batch_advances_in_arrival_order(self):
+        source = make_source()
+        now = timezone.now()
+        # too short to cluster, so they stay unlinked; published most recently
+        stuck = [make_item(source, n, "short note", published_at=now) for n in (1, 2)]
+        late = make_item(source, 3, " ".join(STORY_WORDS), published_at=now - timedelta(hours=5))
+        self.arrive(stuck[0], 3)
+        self.arrive(stuck[1], 2)
+        self.arrive(late, 1)
+
+        cmd = ClusterCommand()
+        self.assertEqual(cmd.cluster(since_hours=24, limit=2, max_dist=3, incremental=True)[1], 0)
+        mark = Watermark.objects.get(name="cluster_events").value
+        self.assertLess(mark, timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(cmd.cluster(since_hours=24, limit=2, max_dist=3, incremental=True)[1], 1)
+        self.assertTrue(EventItem.objects.filter(item=late).exists())
+
+
+class RetryBackoffTests(SimpleTestCase):
+    def delay(self, attempts, retry_after=None):
+        before = timezone.now()
+        return next_attempt_time(attempts, retry_after) - before
+
+    def assertDelay(self, delay, expected):
+        self.assertAlmostEqual(delay.total_seconds(), expected.total_seconds(), delta=5)
+
+    def test_exponential(self):
+        self.assertDelay(self.delay(1), RETRY_BASE)
+        self.assertDelay(self.delay(2), RETRY_BASE * 2)
+        self.assertDelay(self.delay(4), RETRY_BASE * 8)
+
+    def test_capped(self):
+        with mock.patch.object(extract_articles, "RETRY_MAX_DELAY", timedelta(minutes=40)):
+            self.assertDelay(self.delay(4), timedelta(minutes=40))
+
+    def test_retry_after_extends_delay(self):
+        self.assertDelay(self.delay(1, retry_after=3600), timedelta(hours=1))
+        self.assertDelay(self.delay(1, retry_after=5), RETRY_BASE)
+
+    def test_gives_up_after_max_attempts(self):
+        self.assertIsNone(next_attempt_time(MAX_ATTEMPTS))
+
+
+class PickItemsTests(TestCase):
+    def setUp(self):
+        self.source = make_source()
+        self.n = 0
+
+    def raw(self, **kwargs) -> RawItem:
+        self.n += 1
+        return RawItem.objects.create(
+            source=self.source, item_hash=f"p{self.n}", url=f"https://example.com/p{self.n}", **kwargs
+        )
+
+    def fresh(self, count, priority=1):
+        return [self.raw(extract_priority=priority, published_at=timezone.now()) for _ in range(count)]
+
+    def retries(self, count):
+        items = [self.raw(extract_priority=1) for _ in range(count)]
+        for item in items:
+            Article.objects.create(
+                item=item, attempts=1, next_attempt_at=timezone.now() - timedelta(minutes=1)
+            )
+        return items
+
+    def pick(self, limit, **kwargs):
+        return {r.id for r in pick_items.func(limit, **kwargs)}
+
+    def ids(self, items):
+        return {r.id for r in items}
+
+    def test_retry_share_is_reserved(self):
+        retries = self.retries(5)
+        self.fresh(20)
+        picked = self.pick(10)
+        # RETRY_SHARE = 0.2 of 10
+        self.assertEqual(len(picked), 10)
+        self.assertEqual(len(picked & self.ids(retries)), 2)
+
+    def test_unused_share_goes_to_fresh(self):
+        retries = self.retries(1)
+        fresh = self.fresh(20)
+        picked = self.pick(10)
+        self.assertEqual(len(picked & self.ids(retries)), 1)
+        self.assertEqual(len(picked & self.ids(fresh)), 9)
+
+    def test_retries_fill_before_duplicates(self):
+        retries = self.retries(5)
+        fresh = self.fresh(3)
+        dups = self.fresh(5, priority=DUPLICATE_PRIORITY)
+        picked = self.pick(10)
+        self.assertTrue(self.ids(retries) <= picked)
+        self.assertTrue(self.ids(fresh) <= picked)
+        self.assertEqual(len(picked & self.ids(dups)), 2)
+
+    def test_retries_only(self):
+        retries = self.retries(3)
+        self.fresh(5)
+        self.assertEqual(self.pick(10, retries_only=True), self.ids(retries))
+
+
+class ArticleWriterTests(SimpleTestCase):
+    def setUp(self):
+        self.batches = []
+        patcher = mock.patch.object(extract_articles, "write_articles", self.write)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, rows):
+        self.batches.append([item.id for item, _ in rows])
+
+    def run_writer(self, n, **kwargs):
+        written = []
+
+        async def main():
+            writer = ArticleWriter(on_written=written.extend, **kwargs)
+            writer.start()
+            for i in range(n):
+                await writer.put(RawItem(id=i), None)
+            await writer.close()
+            return writer
+
+        return async_to_sync(main)(), written
+
+    def test_batches_by_size(self):
+        writer, written = self.run_writer(5, batch_size=2, max_delay=60)
+        self.assertEqual(self.batches, [[0, 1], [2, 3], [4]])
+        self.assertEqual((writer.written, writer.flushes), (5, 3))
+        self.assertEqual(written, [0, 1, 2, 3, 4])
+
+    def test_flushes_after_max_delay(self):
+        async def main():
+            writer = ArticleWriter(batch_size=100, max_delay=0.01)
+            writer.start()
+            await writer.put(RawItem(id=1), None)
+            await asyncio.sleep(0.1)
+            flushed = list(self.batches)
+            await writer.close()
+            return flushed
+
+        self.assertEqual(async_to_sync(main)(), [[1]])
+
+
+class ArticleWriterRetryTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = 0
+        self.failures = 0
+        for name, value in (
+            ("write_articles", self.write),
+            ("recycle_connections", mock.AsyncMock()),
+            ("WRITE_RETRY_DELAY", 0),
+        ):
+            patcher = mock.patch.object(extract_articles, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, rows):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("MySQL server has gone away")
+
+    def run_writer(self, n, **kwargs):
+        async def main():
+            writer = ArticleWriter(batch_size=2, max_delay=60, **kwargs)
+            writer.start()
+            for i in range(n):
+                await writer.put(RawItem(id=i), None)
+            try:
+                await writer.close()
+            except RuntimeError:
+                pass  # asserted through writer.error / on_error
+            return writer
+
+        return async_to_sync(main)()
+
+    def test_transient_failure_is_retried(self):
+        self.failures = 1
+        writer = self.run_writer(2)
+        self.assertIsNone(writer.error)
+        self.assertEqual((writer.written, self.calls), (2, 2))
+        extract_articles.recycle_connections.assert_awaited_once()
+
+    def test_persistent_failure_stops_writer(self):
+        self.failures = 10
+        errors = []
+        writer = self.run_writer(5, retries=1, on_error=errors.append)
+        # first batch tried twice, the rest dropped without a write
+        self.assertEqual(self.calls, 2)
+        self.assertEqual((writer.written, writer.dropped), (0, 5))
+        self.assertEqual([str(e) for e in errors], ["MySQL server has gone away"])
+
+    def test_close_reraises(self):
+        self.failures = 10
+
+        async def main():
+            writer = ArticleWriter(batch_size=1, retries=0)
+            writer.start()
+            await writer.put(RawItem(id=1), None)
+            await writer.close()
+
+        with self.assertRaisesMessage(RuntimeError, "gone away"):
+            async_to_sync(main)()
+
+
+def flip_bits(h, bits):
+    for b in bits:
+        h ^= 1 << b
+    return h
+
+
+class SimHashIndexTests(SimpleTestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        for max_dist in (0, 1, 3, 6):
+            index = SimHashIndex(max_dist)
+            stored = [rng.getrandbits(64) for _ in range(200)]
+            # near copies so that some queries do have matches
+            stored += [flip_bits(h, rng.sample(range(64), rng.randint(0, 8))) for h in stored[:100]]
+            for i, h in enumerate(stored):
+                index.add(h, i)
+            for q in stored[:100] + [rng.getrandbits(64) for _ in range(50)]:
+                q = flip_bits(q, rng.sample(range(64), rng.randint(0, max_dist + 1)))
+                dists = [hamming64(q, h) for h in stored]
+                best = min(range(len(stored)), key=lambda i: (dists[i], i))
+                expected = best if dists[best] <= max_dist else None
+                self.assertEqual(index.nearest(q), expected, (max_dist, q))
+
+    def test_nearest_prefers_closest_then_earliest(self):
+        index = SimHashIndex(3)
+        h = 0x0123456789ABCDEF
+        index.add(flip_bits(h, [0, 20, 40]), "far")
+        index.add(flip_bits(h, [63]), "close")
+        index.add(flip_bits(h, [62]), "close-later")
+        self.assertEqual(index.nearest(h), "close")
+        self.assertIsNone(index.nearest(flip_bits(h, [1, 17, 33, 49])))
+
+
+class LoadCandidateEventsTests(TestCase):
+    def event(self, name, h):
+        return Event.objects.create(cluster_key=sh64_key(h), title=name, **event_simhash_fields(h))
+
+    def test_band_lookup(self):
+        h = 0x0123456789ABCDEF
+        near = self.event("near", flip_bits(h, [0, 20, 40]))
+        # one bit in each of the four 16-bit bands: no band in common
+        self.event("far", flip_bits(h, [1, 17, 33, 49]))
+        Event.objects.create(cluster_key="legacy", title="no simhash")
+
+        self.assertEqual([e.id for e in load_candidate_events([h], max_dist=3)], [near.id])
+
+    def test_scans_all_beyond_band_recall(self):
+        h = 0x0123456789ABCDEF
+        events = [self.event("near", flip_bits(h, [0])), self.event("far", flip_bits(h, [1, 17, 33, 49]))]
+        self.assertEqual([e.id for e in load_candidate_events([h], max_dist=4)], [e.id for e in events])
@@ -0,0 +1,105 @@
+"""
+Per-Article derived text columns, computed once when the text is extracted
+(inside extract_articles pool workers) instead of on every cluster/summary run:
+
+- clean_len / is_placeholder: the summary cleanup below (summary_sanitize() +
+  is_placeholder() with the default thresholds), also used by rebuild_event_summaries;
+- token_count / simhash: intel.simhash tokenize() and simhash64() (via simhash64_batch).
+
+The two cleanups differ on purpose: summary_sanitize() also removes the video-player
+and "Live:" boilerplate whole, so placeholder pages are judged on what a reader would
+see, while intel.simhash.sanitize() only strips what would skew the fingerprints.
+Changing the latter changes stored SimHashes (and event keys), so they are kept apart.
+"""
+import re
+
+from intel.simhash import WORD_RE, simhash64_batch, to_signed64, tokenize
+
+
+# =========================
+# Summary noise cleanup
+# =========================
+
+SUMMARY_NOISE_PHRASES = [
+    "One of your browser extensions seems to be blocking the video player",
+    "To watch this content, you may need to disable it on this site",
+    "Follow our liveblog",
+    "for all the latest developments.",
+    "for all the latest updates.",
+]
+
+SUMMARY_NOISE_RE = [
+    r"\bLive:\s*",                      # "Live:"
+    r"\bFollow (our )?liveblog.*$",      # tail like "Follow our liveblog ..."
+    r"\bfrom loading(?:\s*\.)*\b",       # "from loading." / "from loading. ."
+    r"\bblocking the video player from loading\b",
+    r"\bOne of your browser extensions seems to be blocking the video player\b",
+    r"\bTo watch this content, you may need to disable it on this site\b",
+]
+
+
+def summary_sanitize(text: str) -> str:
+    t = (text or "").strip()
+
+    for p in SUMMARY_NOISE_PHRASES:
+        t = t.replace(p, " ")
+
+    for rx in SUMMARY_NOISE_RE:
+        t = re.sub(rx, " ", t, flags=re.IGNORECASE | re.MULTILINE)
+
+    t = re.sub(r"\s+", " ", t).strip()
+    return t
+
+
+def token_count(text: str) -> int:
+    return len(WORD_RE.findall((text or "").lower()))
+
+
+DEFAULT_MIN_CLEAN_LEN = 140
+DEFAULT_MIN_TOKENS = 30
+
+
+def is_placeholder(clean_text: str, min_len: int = DEFAULT_MIN_CLEAN_LEN, min_tokens: int = DEFAULT_MIN_TOKENS) -> bool:
+    """Heuristic: detect empty/placeholder/blocked extracts."""
+    if not clean_text:
+        return True
+    if re.search(r"\bfrom loading\b", clean_text, flags=re.IGNORECASE):
+        return True
+    if re.search(r"\bblocking the video player\b", clean_text, flags=re.IGNORECASE):
+        return True
+    if len(clean_text) < min_len:
+        return True
+    if token_count(clean_text) < min_tokens:
+        return True
+    return False
+
+
+FEATURE_FIELDS = ["clean_len", "token_count", "simhash", "is_placeholder"]
+
+
+def text_features(text: str) -> dict:
+    # clean_len/is_placeholder: summary cleanup; token_count/simhash: clustering tokens
+    clean = summary_sanitize(text)
+    toks = tokenize(text)
+    return {
+        "clean_len": len(clean),
+        "token_count": len(toks),
+        "simhash": to_signed64(simhash64_batch([toks])[0]) if toks else None,
+        "is_placeholder": is_placeholder(clean),
+    }
+
+
+def text_features_batch(texts: list[str]) -> list[dict]:
+    """text_features() for many texts, SimHashes computed in one simhash64_batch() call."""
+    token_lists = [tokenize(t) for t in texts]
+    hashes = simhash64_batch(token_lists)
+    out = []
+    for text, toks, h in zip(texts, token_lists, hashes):
+        clean = summary_sanitize(text)
+        out.append({
+            "clean_len": len(clean),
+            "token_count": len(toks),
+            "simhash": to_signed64(h) if toks else None,
+            "is_placeholder": is_placeholder(clean),
+        })
+    return out
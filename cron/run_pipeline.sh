@@ -0,0 +1,21 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+BASE="/home/j/joker2038/clearfield/public_html"
+PROJ="$BASE/clearfield"
+PY="$BASE/venv/bin/python"
+OUT="$BASE/static/brief.md"
+LOG="$BASE/logs/cron_pipeline.log"
+LOCK="$BASE/logs/run_pipeline.lock"
+
+mkdir -p "$BASE/logs"
+mkdir -p "$(dirname "$OUT")"
+
+cd "$PROJ"
+# one run at a time: skip this tick if the previous run is still going
+exec 9>"$LOCK"
+flock -n 9 || { echo "=== $(date -Is) run_pipeline skipped (locked) ===" >> "$LOG"; exit 0; }
+
+echo "=== $(date -Is) run_pipeline start ===" >> "$LOG"
+"$PY" manage.py run_pipeline --since-hours 24 --cluster-limit 2000 --brief-hours 72 --brief-out "$OUT" >> "$LOG" 2>&1
+echo "=== $(date -Is) run_pipeline end ===" >> "$LOG"